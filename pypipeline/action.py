@@ -1,10 +1,8 @@
 import inspect
-from typing import Any, Dict, Type
+from typing import Any, Dict, Sequence, Type
 
-from objinspect import Class
-from stdl.st import kebab_case
-
-from pypipeline.item import Item
+from pypipeline.item import Item, ItemBatch
+from pypipeline.schema import ActionSchema, get_schema, register
 
 
 class Action:
@@ -13,30 +11,32 @@ class Action:
     type: str | None = None
     dict_exclude: list[str] = []
     allow_autoparse: bool = True
+    cacheable: bool = True
 
     def __init__(self) -> None:
         self.validate()
 
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        register(cls)
+
     @classmethod
     @property
     def name(cls):
+        from stdl.st import kebab_case
+
         return kebab_case(cls.__name__)
 
     def dict(self) -> dict[str, Any]:
         return {
-            "name": self.name,
+            "name": self.get_schema().name,
             "type": self.type,
             "args": self.get_args(),
         }
 
     def get_args(self) -> Dict[str, Any]:
-        cls = Class(self.__class__)
-        init_args = cls.init_args
         args = {}
-        if not init_args:
-            return {}
-
-        for i in init_args:
+        for i in self.get_schema().params:
             if i.name in self.dict_exclude:
                 continue
             args[i.name] = getattr(self, i.name)
@@ -63,6 +63,49 @@ class Action:
     def eval(self, item: Item) -> Item:
         raise NotImplementedError
 
+    async def eval_async(self, item: Item) -> Item:
+        return self.eval(item)
+
+    def process_batch(self, items: list[Item]) -> Sequence[Any]:
+        """
+        Process a batch of items at once. Should return one result per item, same as `process` would.
+        Override this to handle a whole batch with a single (e.g. vectorized) call.
+        'items' can also be an ItemBatch, in which case filters return a mask over all of its rows
+        and modifiers update its columns in place and return it.
+        """
+        return [self.process(item) for item in items]
+
+    def eval_batch(self, items: list[Item]) -> list[Item]:
+        return [self.eval(item) for item in items]
+
+    def eval_columns(self, batch: ItemBatch) -> ItemBatch:
+        """
+        Evaluate the action on the kept rows of an ItemBatch.
+        Actions without `process_batch` are evaluated on a view of each row.
+        """
+        for row in batch.rows():
+            if self.eval(row) is not row:
+                raise TypeError(
+                    f"{self.__class__.__name__} must modify rows of an ItemBatch in place"
+                )
+        return batch
+
+    @classmethod
+    def has_batch(cls) -> bool:
+        """
+        Returns True if the action implements `process_batch` for its current `process` method.
+        A subclass that overrides only `process` falls back to evaluating items one by one.
+        """
+        batch_owner = _method_owner(cls, "process_batch")
+        return batch_owner is not Action and issubclass(batch_owner, _method_owner(cls, "process"))
+
+    @classmethod
+    def is_async(cls) -> bool:
+        """
+        Returns True if the action's process method is a coroutine function.
+        """
+        return inspect.iscoroutinefunction(cls.process)
+
     @classmethod
     def parse(cls, val: str | None = None) -> "Action":
         return NotImplemented
@@ -82,6 +125,10 @@ class Action:
     def get_docstring(cls) -> str:
         return inspect.getdoc(cls) or ""
 
+    @classmethod
+    def get_schema(cls) -> ActionSchema:
+        return get_schema(cls)
+
 
 class Modifier(Action):
     type = "modifier"
@@ -92,6 +139,26 @@ class Modifier(Action):
     def eval(self, item: Item) -> Item:
         return self.process(item)
 
+    async def eval_async(self, item: Item) -> Item:
+        res = self.process(item)
+        if inspect.isawaitable(res):
+            res = await res
+        return res
+
+    def eval_batch(self, items: list[Item]) -> list[Item]:
+        if not self.has_batch():
+            return super().eval_batch(items)
+        return list(self.process_batch(items))
+
+    def eval_columns(self, batch: ItemBatch) -> ItemBatch:
+        if not self.has_batch():
+            return super().eval_columns(batch)
+        if batch.count_discarded() == 0:
+            return self.process_batch(batch)  # type: ignore
+        rows = batch.kept_rows()
+        batch.assign(rows, self.process_batch(batch.select(rows)))  # type: ignore
+        return batch
+
 
 class Filter(Action):
     type = "filter"
@@ -108,9 +175,38 @@ class Filter(Action):
         item.discarded = not res
         return item
 
+    async def eval_async(self, item: Item) -> Item:
+        res = self.process(item)
+        if inspect.isawaitable(res):
+            res = await res
+        if self.invert:
+            res = not res
+        item.discarded = not res
+        return item
+
+    def eval_batch(self, items: list[Item]) -> list[Item]:
+        if not self.has_batch():
+            return super().eval_batch(items)
+        for item, res in zip(items, self.process_batch(items)):
+            item.discarded = bool(res) == self.invert
+        return items
+
+    def eval_columns(self, batch: ItemBatch) -> ItemBatch:
+        if not self.has_batch():
+            return super().eval_columns(batch)
+        batch.keep_where(self.process_batch(batch), invert=self.invert)  # type: ignore
+        return batch
+
+
+def _method_owner(cls: type, name: str) -> type:
+    for i in cls.__mro__:
+        if name in i.__dict__:
+            return i
+    raise AttributeError(name)
+
 
 def get_actions_dict(actions: list[Type[Action]]) -> dict[str, Type[Action]]:
-    return {i.name: i for i in actions}
+    return {i.get_schema().name: i for i in actions}
 
 
 def parse_action(data: dict, actions: dict[str, Type[Action]]) -> Action:
@@ -118,6 +214,10 @@ def parse_action(data: dict, actions: dict[str, Type[Action]]) -> Action:
     if name not in actions:
         raise ValueError(f"Unknown action: '{name}'")
     cls = actions[name]
+    schema = cls.get_schema()
+    for i in data["args"]:
+        if schema.get_param(i) is None and not schema.accepts_kwargs:
+            raise ValueError(f"Action '{name}' does not have an argument '{i}'")
     return cls(**data["args"])
 
 
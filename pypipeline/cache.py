@@ -0,0 +1,333 @@
+import copy
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Hashable
+
+from pypipeline.action import Action, Filter
+from pypipeline.constants import CACHE_SIZE, DISK_CACHE_BATCH, DISK_CACHE_FILE, DISK_CACHE_SIZE
+from pypipeline.item import Item
+
+if TYPE_CHECKING:
+    import sqlite3
+
+_MISSING = object()
+
+
+class ActionCache:
+    """
+    LRU cache of action results, keyed by the action's identity and `Item.cache_key()`.
+
+    Filters store their verdict, modifiers store a copy of the item they returned.
+    Items whose `cache_key` returns None and actions with `cacheable = False` are never cached.
+    The identity of an action is its class, whether it's inverted and the values of all of its `__init__`
+    parameters (including those in `dict_exclude`), so equal actions share cache entries.
+    Actions that don't store each `__init__` parameter in an attribute of the same name are not cached.
+
+    With the "processes" executor, each worker fills its own copy of the cache and only the hit and miss
+    counters are sent back to the parent, so results found by workers aren't in the parent's cache.
+    Use a DiskCache to share results between workers and runs.
+
+    Args:
+        maxsize (int, optional): Maximum number of cached results.
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[tuple[str, Hashable], Any] = OrderedDict()
+        self._ids: dict[int, tuple[Action, str | None]] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(size={len(self)}, maxsize={self.maxsize}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_ids"] = {}
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+    def action_id(self, action: Action) -> str | None:
+        """
+        Returns the key of 'action' in the cache, or None if its identity can't be determined.
+        """
+        try:
+            return self._ids[id(action)][1]
+        except KeyError:
+            pass
+        try:
+            identity: str | None = repr(_identity(action))
+        except _UnknownIdentity:
+            identity = None
+        self._ids[id(action)] = (action, identity)  # keeps the action alive, so its id is not reused
+        return identity
+
+    def eval(self, action: Action, item: Item) -> Item:
+        """
+        Evaluate 'action' on 'item', or reuse the result of an earlier evaluation on an item with the same key.
+        """
+        if not action.cacheable:
+            return action.eval(item)
+        item_key = item.cache_key()
+        if item_key is None:
+            return action.eval(item)
+        action_id = self.action_id(action)
+        if action_id is None:
+            return action.eval(item)
+        key = (action_id, item_key)
+        value = self.get(key)
+        if value is not _MISSING:
+            self.add_counts(1, 0)
+            if isinstance(action, Filter):
+                item.discarded = value
+                return item
+            return copy.deepcopy(value)
+
+        self.add_counts(0, 1)
+        item = action.eval(item)
+        self.put(key, item.discarded if isinstance(action, Filter) else copy.deepcopy(item))
+        return item
+
+    def get(self, key: tuple[str, Hashable]) -> Any:
+        """
+        Returns the cached result for 'key', or `_MISSING`.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: tuple[str, Hashable], value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def sync(self) -> None:
+        """
+        Write pending results to persistent storage. The in-memory cache has none.
+        """
+        return
+
+    def add_counts(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def take_counts(self) -> tuple[int, int]:
+        """
+        Return the hit and miss counters and reset them.
+        """
+        with self._lock:
+            counts = self.hits, self.misses
+            self.hits = self.misses = 0
+        return counts
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._ids.clear()
+            self.hits = self.misses = 0
+
+    def dict(self) -> dict[str, Any]:
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class _UnknownIdentity(Exception):
+    pass
+
+
+def _identity(value: Any) -> Any:
+    """
+    Returns the class, inversion and `__init__` arguments of an action, recursing into actions it was created with.
+    Raises _UnknownIdentity if an argument isn't stored in an attribute of the same name.
+    """
+    if isinstance(value, Action):
+        cls = type(value)
+        args = {}
+        for i in cls.get_schema().params:
+            arg = getattr(value, i.name, _MISSING)
+            if arg is _MISSING:
+                raise _UnknownIdentity(f"{cls.__qualname__} doesn't store its argument '{i.name}'")
+            args[i.name] = _identity(arg)
+        return f"{cls.__module__}.{cls.__qualname__}", getattr(value, "invert", None), args
+    if isinstance(value, (list, tuple)):
+        return [_identity(i) for i in value]
+    return value
+
+
+class DiskCache(ActionCache):
+    """
+    ActionCache that also keeps results in a sqlite database in 'path', so they are reused across runs.
+
+    Results are looked up in memory first, then on disk. New results and the last use of disk results
+    are written in batches, every 'batch_size' changes and on `sync`. After each write, the least
+    recently used results over 'maxsize' are deleted. The number of results is counted once when the
+    database is opened and then tracked, so with several processes sharing the same directory the limit
+    is approximate until the next run.
+
+    Pending changes are not pickled; call `sync` before passing the cache to another process.
+
+    On disk, results are keyed by a hash of the action's identity and `repr(item.cache_key())`,
+    so item keys must have a repr that doesn't change between runs, e.g. strings, numbers or tuples of them.
+    Cached items are stored with pickle.
+
+    Args:
+        path (str): Directory of the cache. Created if it doesn't exist.
+        maxsize (int, optional): Maximum number of results kept on disk.
+        memory_size (int, optional): Maximum number of results kept in memory.
+        batch_size (int, optional): Number of changes written at once.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        maxsize: int = DISK_CACHE_SIZE,
+        memory_size: int = CACHE_SIZE,
+        batch_size: int = DISK_CACHE_BATCH,
+    ) -> None:
+        super().__init__(memory_size)
+        self.path = path
+        self.disk_maxsize = maxsize
+        self.batch_size = batch_size
+        self._conn: "sqlite3.Connection | None" = None
+        self._pending: dict[bytes, tuple[bytes | None, float]] = {}  # key -> (value, last used)
+        self._disk_size = 0  # rows in the database, counted when it's opened
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(path={self.path}, maxsize={self.disk_maxsize}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_conn"] = None
+        state["_pending"] = {}
+        return state
+
+    @property
+    def connection(self) -> "sqlite3.Connection":
+        if self._conn is None:
+            import sqlite3
+
+            os.makedirs(self.path, exist_ok=True)
+            conn = sqlite3.connect(
+                os.path.join(self.path, DISK_CACHE_FILE), timeout=30, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, value BLOB NOT NULL, used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+            conn.commit()
+            (self._disk_size,) = conn.execute("SELECT COUNT(*) FROM results").fetchone()
+            self._conn = conn
+        return self._conn
+
+    def disk_key(self, key: tuple[str, Hashable]) -> bytes:
+        action_id, item_key = key
+        return hashlib.sha256(f"{action_id}\0{item_key!r}".encode()).digest()
+
+    def get(self, key: tuple[str, Hashable]) -> Any:
+        value = super().get(key)
+        if value is not _MISSING:
+            return value
+        disk_key = self.disk_key(key)
+        with self._lock:
+            if disk_key in self._pending and self._pending[disk_key][0] is not None:
+                data = self._pending[disk_key][0]
+            else:
+                row = self.connection.execute(
+                    "SELECT value FROM results WHERE key = ?", (disk_key,)
+                ).fetchone()
+                if row is None:
+                    return _MISSING
+                data = row[0]
+                self._pending[disk_key] = (None, time.time())
+        value = pickle.loads(data)
+        super().put(key, value)
+        self._sync_if_full()
+        return value
+
+    def put(self, key: tuple[str, Hashable], value: Any) -> None:
+        super().put(key, value)
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._pending[self.disk_key(key)] = (data, time.time())
+        self._sync_if_full()
+
+    def _sync_if_full(self) -> None:
+        if len(self._pending) >= self.batch_size:
+            self.sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            inserts = [(k, v, used) for k, (v, used) in self._pending.items() if v is not None]
+            touched = [(used, k) for k, (v, used) in self._pending.items() if v is None]
+            self._pending.clear()
+            conn = self.connection
+            with conn:
+                conn.executemany(
+                    "UPDATE results SET value = ?, used = ? WHERE key = ?", [(v, u, k) for k, v, u in inserts]
+                )
+                added = conn.executemany("INSERT OR IGNORE INTO results VALUES (?, ?, ?)", inserts).rowcount
+                conn.executemany("UPDATE results SET used = ? WHERE key = ?", touched)
+                self._disk_size += max(added, 0)
+                if self._disk_size > self.disk_maxsize:
+                    deleted = conn.execute(
+                        "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used LIMIT ?)",
+                        (self._disk_size - self.disk_maxsize,),
+                    ).rowcount
+                    self._disk_size -= deleted
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self._pending.clear()
+            with self.connection as conn:
+                conn.execute("DELETE FROM results")
+            self._disk_size = 0
+
+    def close(self) -> None:
+        self.sync()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+__all__ = ["ActionCache", "DiskCache"]
@@ -1,35 +1,42 @@
-import inspect
+import json
+import os
 import sys
-from functools import cached_property
-from multiprocessing import cpu_count
-from typing import Literal, Type
-
-import docstring_parser
-from objinspect import Class, Method
-from stdl.st import colored, kebab_case
-from strto import get_parser
+from functools import cache, cached_property, partial
+from typing import Any, Iterable, Iterator, Literal, Type
 
 from pypipeline.action import Action
+from pypipeline.cache import DiskCache
 from pypipeline.constants import (
     CLI_HELP_INDENT,
     CLI_MAX_LJUST,
     CLI_MIN_LJUST,
     FILTER_INVERT_SUFFIX,
+    EXECUTORS,
     FLAG_PREFIX_LONG,
     FLAG_PREFIX_SHORT,
+    INPUT_BATCH_SIZE,
+    INPUT_BUFFER_SIZE,
+    OUTPUT_FORMATS,
     RESERVED_FLAGS,
     ExitCodes,
 )
 from pypipeline.item import Item
-from pypipeline.items_container import ItemsContainer
 from pypipeline.pipeline import Pipeline
+from pypipeline.schema import ActionSchema, get_schema, load_schemas, save_schemas
+from pypipeline.sink import open_sink
 from pypipeline.util import (
     fill_missing_abbreviations,
     get_executable_name,
     get_taken_abbreviations,
+    read_lines,
 )
 
-TYPE_PARSER = get_parser()
+
+@cache
+def get_type_parser():
+    from strto import get_parser
+
+    return get_parser()
 
 
 def flag_remove_prefix(flag: str) -> str:
@@ -43,16 +50,14 @@ def flag_remove_prefix(flag: str) -> str:
 class ActionAutoParser:
     def __init__(self, action: Type[Action]) -> None:
         self.action = action
-        self.has_custom_parse_fn = action.is_parsable()
-        self.obj_action = Class(action)
+        self.schema = get_schema(action)
+        self.has_custom_parse_fn = self.schema.parsable
 
         if self.has_custom_parse_fn:
-            self.init_obj_container = Method(self.action.parse, self.action)
-            self.init_args = self.init_obj_container.params
+            self.init_args = self.schema.parse_params
             self.init_fn = self.action.parse
         else:
-            self.init_args = self.obj_action.init_args
-            self.init_obj_container = self.obj_action.init_method
+            self.init_args = self.schema.params
             self.init_fn = self.action
 
         self.arg_index = 0
@@ -79,27 +84,27 @@ class ActionAutoParser:
     def parse(self, value):
         if self.init_args is None or len(self.init_args) == 0:
             raise ValueError(
-                f"Action '{self.obj_action.name}' does not take any arguments."
+                f"Action '{self.action.__name__}' does not take any arguments."
             )
 
         if not self.positionals_done():
             param = self.init_args[self.arg_index]
-            self.args[param.name] = TYPE_PARSER.parse(value, param.type)
+            self.args[param.name] = get_type_parser().parse(value, param.type)
             self.arg_index += 1
             return
 
         if "=" in value:
             param_name, param_value = value.split("=")
-            if param_name not in self.obj_action._methods:
+            parameter = self.schema.get_param(param_name, parse=self.has_custom_parse_fn)
+            if parameter is None:
                 raise ValueError(
-                    f"Action '{self.obj_action.name}' does not have an argument '{param_name}'."
+                    f"Action '{self.action.__name__}' does not have an argument '{param_name}'."
                 )
-            parameter = self.init_obj_container.get_param(param_name)  # type: ignore
-            self.args[param_name] = TYPE_PARSER.parse(param_value, parameter.type)
+            self.args[param_name] = get_type_parser().parse(param_value, parameter.type)
             return
 
         param = self.init_args[self.arg_index]
-        self.args[param.name] = TYPE_PARSER.parse(value, param.type)
+        self.args[param.name] = get_type_parser().parse(value, param.type)
         self.arg_index += 1
 
     def parsed_max(self) -> bool:
@@ -117,8 +122,9 @@ class ActionAutoParser:
 
 
 class ActionContainer:
-    def __init__(self, action: Action) -> None:
+    def __init__(self, action: Action, schema: ActionSchema | None = None) -> None:
         self.cls = action
+        self.schema = schema or get_schema(action)  # type: ignore
 
     def __repr__(self) -> str:
         return f"ActionContainer(for:'{self.name}', CLI flags:'{self.cli_help_flag}')"  # type: ignore
@@ -129,25 +135,17 @@ class ActionContainer:
 
     @cached_property
     def flag_short(self):
-        if not self.cls.abbrev:
+        if not self.schema.abbrev:
             return None
-        return FLAG_PREFIX_SHORT + self.cls.abbrev
+        return FLAG_PREFIX_SHORT + self.schema.abbrev
 
     @cached_property
     def flag_long(self):
-        return FLAG_PREFIX_LONG + kebab_case(self.name)
+        return FLAG_PREFIX_LONG + self.schema.name
 
-    @cached_property
+    @property
     def description(self) -> str:
-        doc = self.cls.get_docstring()
-        if doc is None:
-            return ""
-        doc = docstring_parser.parse(doc)
-        if doc.short_description:
-            return doc.short_description
-        if doc.long_description:
-            return doc.long_description
-        return ""
+        return self.schema.description
 
     @cached_property
     def cli_help_flag(self):
@@ -156,13 +154,21 @@ class ActionContainer:
         return f"{CLI_HELP_INDENT * ' '}{self.flag_short}, {self.flag_long}"
 
     def get_help_long(self):
-        docstr = inspect.getdoc(self.cls)
-        action_name = kebab_case(self.name)
-        return f"{action_name} | {self.cls.type} | abbrev='{self.cls.abbrev}' | priority={self.cls.priority}\n\n{docstr}"
+        s = self.schema
+        return f"{s.name} | {s.type} | abbrev='{s.abbrev}' | priority={s.priority}\n\n{s.doc}"
 
 
 class CommandLineActionsManager:
-    def __init__(self, actions: list[Action]) -> None:
+    """
+    Maps command line flags to actions.
+
+    Args:
+        actions (list[Action]): Action classes available on the command line.
+        schema_cache (str, optional): Path of a file that caches the schemas of the actions between runs.
+            It's rewritten when a module that defines one of the actions changes.
+    """
+
+    def __init__(self, actions: list[Action], schema_cache: str | None = None) -> None:
         actions_abbrevs = get_taken_abbreviations(actions)
         for i in actions_abbrevs:
             if i in RESERVED_FLAGS:
@@ -170,10 +176,18 @@ class CommandLineActionsManager:
                     f"action abbrevation can't be any of: {', '.join(RESERVED_FLAGS)}"
                 )
 
-        self.taken_flags = [*RESERVED_FLAGS, *get_taken_abbreviations(actions)]
-        fill_missing_abbreviations(actions, taken=self.taken_flags)
+        self.taken_flags = [*RESERVED_FLAGS, *actions_abbrevs]
+        schemas = load_schemas(actions, schema_cache)  # type: ignore
+        if schemas is None:
+            fill_missing_abbreviations(actions, taken=self.taken_flags)
+            schemas = [get_schema(i) for i in actions]  # type: ignore
+            if schema_cache is not None:
+                save_schemas(actions, schema_cache)  # type: ignore
+        else:
+            for action, schema in zip(actions, schemas):
+                action.abbrev = schema.abbrev
         self.cli_action_map: dict[str, ActionContainer] = {}
-        self.actions = [ActionContainer(i) for i in actions]
+        self.actions = [ActionContainer(i, schema) for i, schema in zip(actions, schemas)]
         self.collect_actions()
 
     def collect_actions(self) -> None:
@@ -210,9 +224,29 @@ class CommandLineActionsManager:
         return self.cli_action_map.get(name, None)
 
 
+class CollectError(Exception):
+    """
+    Raised when `collect_items` fails in a worker process.
+    """
+
+
+@cache
+def _worker_cli(cli: Type["PyPipelineCLI"]) -> "PyPipelineCLI":
+    return cli.__new__(cli)
+
+
+def _collect_in_worker(cli: Type["PyPipelineCLI"], lines: list[str]) -> list[Item]:
+    try:
+        return _worker_cli(cli).collect_items(lines)
+    except Exception as e:
+        raise CollectError(str(e)) from e
+
+
 class PyPipelineCLI:
     pipeline_cls = Pipeline
     name = "PyPipeline"
+    schema_cache: str | None = None
+    collect_in_workers = False  # split '--input' files between worker processes, see `collect_items`
 
     def __init__(
         self,
@@ -228,19 +262,35 @@ class PyPipelineCLI:
         self.print_results = print_results
         self.read_from_stdin = read_from_stdin
 
-        self.err_label = colored(f"[{self.name}]", "red")
         self.executable = get_executable_name()
-        self.t = cpu_count() - 1
+        self.t = (os.cpu_count() or 1) - 1
+        self.executor = "processes"
+        self.stats = False
+        self.stats_json = None
+        self.input_file = None
+        self.output_file = None
+        self.output_format = "text"
+        self.cache_dir = None
+        self.limit = None
+        self.ordered = True
+        self.pipeline = None
+        self.num_items = 0
         self.verbose = False
         self.help = None
         self.items = []
 
-        self.manager = CommandLineActionsManager(actions)
+        self.manager = CommandLineActionsManager(actions, schema_cache=self.schema_cache)
         self.help = self.help_string
 
         if run:
             self.run()
 
+    @cached_property
+    def err_label(self) -> str:
+        from stdl.st import colored
+
+        return colored(f"[{self.name}]", "red")
+
     def log_error(self, message: str):
         print(f"{self.err_label} {message}", file=sys.stderr)
 
@@ -250,12 +300,13 @@ class PyPipelineCLI:
         print(f"[{self.name}] {message}")
 
     def help_usage(self) -> str:
-        return f"usage: {self.executable} [--help] [-v] [--mode] MODE [-t] T [actions] [items]"
+        return f"usage: {self.executable} [--help] [-v] [--mode] MODE [-t] T [--executor] EXECUTOR [--stats] [--stats-json] PATH [--input] FILE [--output] FILE [--output-format] FORMAT [--cache-dir] DIR [--limit] N [--unordered] [actions] [items]"
 
     def help_usage_notes(self) -> str:
         notes = [
             f"\n\nnotes:",
             "  filters can be inverted by adding a '!' after the flag",
+            "  if no items are given, they are read from stdin, one per line",
             f"  you can get help for a specific action by running '{self.executable} <action> --help'\n",
         ]
         return "\n".join(notes)
@@ -267,6 +318,19 @@ class PyPipelineCLI:
             f"  --mode".ljust(ljust)
             + f"   display kept/discarded items (default: '{self.mode}')",
             f"  -t".ljust(ljust) + f"   number of threads to use (default: {self.t})",
+            f"  --executor".ljust(ljust)
+            + f"   how to run items in parallel: {'/'.join(EXECUTORS)} (default: '{self.executor}')",
+            f"  --input".ljust(ljust) + "   read items from a file, one per line ('-' for stdin)",
+            f"  --output".ljust(ljust) + "   write results to a file instead of stdout",
+            f"  --output-format".ljust(ljust)
+            + f"   format of the results: {'/'.join(OUTPUT_FORMATS)} (default: '{self.output_format}')",
+            f"  --limit".ljust(ljust) + "   stop after finding this many items",
+            f"  --unordered".ljust(ljust)
+            + "   print results as soon as they are found instead of in input order",
+            f"  --cache-dir".ljust(ljust)
+            + "   reuse action results from earlier runs, stored in a directory",
+            f"  --stats".ljust(ljust) + "   print per-action stats after the run",
+            f"  --stats-json".ljust(ljust) + "   write per-action stats to a JSON file after the run",
             f"  -v, -verbose".ljust(ljust)
             + "   verbose mode (extra log messages and progress bars)",
         ]
@@ -305,12 +369,45 @@ class PyPipelineCLI:
                     case "t":
                         self.t = int(args[i + 1])
                         i += 2
+                    case "executor":
+                        self.executor = args[i + 1]
+                        if not self.executor in EXECUTORS:
+                            self.log_error(f"invalid executor: {self.executor}")
+                            sys.exit(ExitCodes.INPUT_ERROR)
+                        i += 2
                     case "mode":
                         self.mode = args[i + 1]
                         if not self.mode in ["kept", "discarded"]:
                             self.log_error(f"invalid mode: {self.mode}")
                             sys.exit(ExitCodes.INPUT_ERROR)
                         i += 2
+                    case "input":
+                        self.input_file = args[i + 1]
+                        i += 2
+                    case "output":
+                        self.output_file = args[i + 1]
+                        i += 2
+                    case "output-format":
+                        self.output_format = args[i + 1]
+                        if not self.output_format in OUTPUT_FORMATS:
+                            self.log_error(f"invalid output format: {self.output_format}")
+                            sys.exit(ExitCodes.INPUT_ERROR)
+                        i += 2
+                    case "limit":
+                        self.limit = int(args[i + 1])
+                        i += 2
+                    case "unordered":
+                        self.ordered = False
+                        i += 1
+                    case "cache-dir":
+                        self.cache_dir = args[i + 1]
+                        i += 2
+                    case "stats":
+                        self.stats = True
+                        i += 1
+                    case "stats-json":
+                        self.stats_json = args[i + 1]
+                        i += 2
                     case "v":
                         self.verbose = True
                         i += 1
@@ -358,31 +455,121 @@ class PyPipelineCLI:
 
         return actions
 
-    def _process_items(self, items: list[Item], actions: list[Action]):
-        pipeline = self._create_pipeline(actions)
-        if self.t != 1:
-            if len(items) < self.t:
-                self.log_info(
-                    f"number of items is less than number of threads, using {len(items)} thread(s)"
+    def _read_input(self) -> Iterator[list[str]]:
+        if self.items:
+            yield self.items
+        if self.input_file is not None and self.input_file != "-":
+            with open(
+                self.input_file,
+                encoding="utf-8",
+                errors="surrogateescape",
+                newline="\n",
+                buffering=INPUT_BUFFER_SIZE,
+            ) as f:
+                yield from read_lines(f, INPUT_BATCH_SIZE)
+        elif self.input_file == "-" or (
+            self.read_from_stdin and not self.items and not sys.stdin.isatty()
+        ):
+            with open(
+                sys.stdin.fileno(),
+                encoding="utf-8",
+                errors="surrogateescape",
+                newline="\n",
+                buffering=INPUT_BUFFER_SIZE,
+                closefd=False,
+            ) as f:
+                yield from read_lines(f, INPUT_BATCH_SIZE)
+
+    def _collect_items(self) -> Iterator[Item]:
+        try:
+            for lines in self._read_input():
+                items = self.collect_items(lines) or []
+                self.num_items += len(items)
+                yield from items
+        except Exception as e:
+            self.log_error(f"error while collecting items: {e}")
+            sys.exit(ExitCodes.INPUT_ERROR)
+
+    def _use_mmap_input(self) -> bool:
+        return (
+            self.collect_in_workers
+            and self.input_file not in (None, "-")
+            and not self.items
+            and self.t != 1
+            and self.executor == "processes"
+            and os.path.isfile(self.input_file)  # type: ignore
+        )
+
+    def _process_file(self, actions: list[Action]) -> Iterator[Item]:
+        with self._create_pipeline(actions) as pipeline:
+            self.pipeline = pipeline
+            yield from pipeline.process_file_iter(
+                self.input_file,  # type: ignore
+                partial(_collect_in_worker, type(self)),
+                t=self.t,
+                mode=self.mode,  # type: ignore
+                limit=self.limit,
+                ordered=self.ordered,
+            )
+            self.num_items += sum(i.items for i in pipeline.worker_stats)
+
+    def _process_items(self, items: Iterable[Item], actions: list[Action]) -> Iterator[Item]:
+        with self._create_pipeline(actions) as pipeline:
+            self.pipeline = pipeline
+            if self.t != 1 and self.executor != "serial":
+                yield from pipeline.process_multi_iter(
+                    items,
+                    t=self.t,
+                    mode=self.mode,  # type: ignore
+                    limit=self.limit,
+                    ordered=self.ordered,
                 )
-                self.t = len(items)
-            res = pipeline.process_multi(items, t=self.t)
-        else:
-            res = pipeline.process(items)
-        return res
+            else:
+                yield from pipeline.process_iter(items, mode=self.mode, limit=self.limit)  # type: ignore
 
     def _create_pipeline(self, actions: list[Action]):
-        return self.pipeline_cls(actions=actions, verbose=self.verbose)
-
-    def _print_results(self, items: ItemsContainer):
-        if self.mode == "kept":
-            for item in items.kept:
-                print(item)
-        else:
-            for item in items.discarded:
-                print(item)
+        """
+        Create `pipeline_cls`. 'executor', 'profile' and 'cache' are only passed when they're set from
+        the command line, so a custom pipeline class only needs to accept the options it supports.
+        """
+        kwargs: dict[str, Any] = {}
+        if self.executor != "processes":
+            kwargs["executor"] = self.executor
+        if self.stats or self.stats_json is not None:
+            kwargs["profile"] = True
+        if self.cache_dir is not None:
+            kwargs["cache"] = DiskCache(self.cache_dir)
+        pipeline = self.pipeline_cls(actions=actions, verbose=self.verbose, **kwargs)
+        pipeline.merge_pattern_filters()
+        pipeline.compile()
+        return pipeline
+
+    def _print_results(self, items: Iterable[Item]):
+        with open_sink(self.output_format, self.output_file) as sink:
+            for item in items:
+                sink.write(item)
+
+    def _report_stats(self):
+        if self.pipeline is None:
+            return
+        if self.stats and self.pipeline.cache is not None:
+            print(self.pipeline.cache, file=sys.stderr)
+        if self.pipeline.stats is None:
+            return
+        if self.stats:
+            print(self.pipeline.stats.table(), file=sys.stderr)
+        if self.stats_json is not None:
+            with open(self.stats_json, "w") as f:
+                json.dump(self.pipeline.stats.dict(), f, indent=2)
 
     def collect_items(self, items: list[str]) -> list[Item]:
+        """
+        Create items from lines of input.
+
+        If `collect_in_workers` is set, input files are split between worker processes and this runs
+        in the workers on an instance of the CLI class that wasn't initialized, so it must not rely on
+        instance attributes. Otherwise it runs in the main process.
+        """
         raise NotImplementedError
 
     def run(self):
@@ -392,9 +579,6 @@ class PyPipelineCLI:
             self.log_error(f"error while parsing arguments: {e}")
             sys.exit(ExitCodes.PARSING_ERROR)
 
-        # if self.read_from_stdin:
-        #    self.items.extend(read_stdin())
-
         if actions is None:
             self.log_error(
                 f"no actions provided. run '{self.executable} --help' to see available actions"
@@ -402,22 +586,28 @@ class PyPipelineCLI:
             sys.exit(ExitCodes.INPUT_ERROR)
 
         try:
-            items = self.collect_items(self.items)
-        except Exception as e:
+            if self._use_mmap_input():
+                processed_items = self._process_file(actions)
+            else:
+                processed_items = self._process_items(self._collect_items(), actions)
+            if self.print_results:
+                self._print_results(processed_items)
+            else:
+                for _ in processed_items:
+                    pass
+        except BrokenPipeError:  # output was closed early, e.g. piped to 'head'
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(ExitCodes.SUCCESS)
+        except CollectError as e:
             self.log_error(f"error while collecting items: {e}")
             sys.exit(ExitCodes.INPUT_ERROR)
-
-        if not items or len(items) == 0:
-            self.log_info("no items to process found")
-            sys.exit(ExitCodes.INPUT_ERROR)
-
-        try:
-            processed_items = self._process_items(items, actions)
         except Exception as e:
             self.log_error(f"error while processing items: {e}")
             sys.exit(ExitCodes.PARSING_ERROR)
-        if self.print_results:
-            self._print_results(processed_items)
+        if self.num_items == 0:
+            self.log_info("no items to process found")
+            sys.exit(ExitCodes.INPUT_ERROR)
+        self._report_stats()
         sys.exit(ExitCodes.SUCCESS)
 
 
@@ -6,11 +6,44 @@ INT_MIN = -INT_MAX - 1
 FLAG_PREFIX_SHORT = "-"
 FLAG_PREFIX_LONG = "--"
 HELP_INDENT = "  "
-RESERVED_FLAGS = ["help", "t", "v", "verbose", "mode"]
+RESERVED_FLAGS = [
+    "help",
+    "t",
+    "v",
+    "verbose",
+    "mode",
+    "executor",
+    "stats",
+    "stats-json",
+    "input",
+    "output",
+    "output-format",
+    "cache-dir",
+    "limit",
+    "unordered",
+]
 FILTER_INVERT_SUFFIX = "!"
 CLI_HELP_INDENT = 2
 CLI_MIN_LJUST = 8
 CLI_MAX_LJUST = 24
+EXECUTORS = ["serial", "threads", "processes"]
+MULTI_CHUNKSIZE = 64
+MULTI_PREFETCH = 4
+ASYNC_CONCURRENCY = 64
+BATCH_SIZE = 1024
+ADAPTIVE_REORDER_INTERVAL = 1000
+LATENCY_BUCKETS_PER_OCTAVE = 4
+INPUT_BUFFER_SIZE = 1 << 20
+INPUT_BATCH_SIZE = 4096
+MMAP_RANGE_SIZE = 4 << 20
+OUTPUT_FORMATS = ["text", "jsonl", "binary"]
+OUTPUT_BUFFER_SIZE = 1 << 16
+CACHE_SIZE = 4096
+DISK_CACHE_SIZE = 1_000_000
+DISK_CACHE_BATCH = 1024
+DISK_CACHE_FILE = "cache.sqlite"
+STAGE_QUEUE_SIZE = 8
+STAGE_POLL_INTERVAL = 0.05
 
 
 class ExitCodes:
@@ -1,14 +1,24 @@
+import os
 import re
-from fnmatch import fnmatch
-from typing import Literal
+from fnmatch import translate
+from typing import Any, Literal, Sequence
 
-from pypipeline.action import Filter
+from pypipeline.action import Action, Filter, _method_owner
 from pypipeline.constants import INT_MAX, INT_MIN, SEP
-from pypipeline.util import get_pattern_type
+from pypipeline.item import ItemBatch
+from pypipeline.lazy import numpy
+from pypipeline.util import get_pattern_type, glob_matcher, regex_matcher
 
 
 class IntFilter(Filter):
+    """
+    Keeps items whose value is in the range [low, high].
+    Set `column` or override `get_value` to select which value of an item is checked.
+    Batches are checked with a single vectorized comparison if numpy is installed.
+    """
+
     t = int
+    column: str | None = None
 
     def __init__(self, low=INT_MIN, high=INT_MAX, invert=False) -> None:
         self.low = low
@@ -19,6 +29,27 @@ class IntFilter(Filter):
         if self.low > self.high:
             raise ValueError
 
+    def get_value(self, item: Any):
+        if self.column is None:
+            return item
+        return getattr(item, self.column)
+
+    def get_values(self, items: Sequence[Any] | ItemBatch) -> Sequence:
+        if isinstance(items, ItemBatch) and self.column is not None:
+            return items[self.column]
+        return [self.get_value(i) for i in items]
+
+    def process(self, item: Any) -> bool:
+        return self.low <= self.get_value(item) <= self.high
+
+    def process_batch(self, items: Sequence[Any]) -> Sequence[bool]:
+        values = self.get_values(items)
+        np = numpy()
+        if np is None:
+            return [self.low <= i <= self.high for i in values]
+        values = np.asarray(values)
+        return (values >= self.low) & (values <= self.high)
+
     @classmethod
     def parse(cls, val: str | None = None):
         if val is None or val == "":
@@ -44,37 +75,85 @@ class FloatFilter(IntFilter):
     t = float
 
 
-class RegexFilter(Filter):
+class PatternFilter(Filter):
+    """
+    Base class for filters that match text against a pattern.
+    Override `get_text` to select which text of an item is matched.
+
+    Consecutive pattern filters that only override `get_text` can be merged with `merge_pattern_filters`.
+    Filters that share the same `get_text` method (e.g. from a common mixin) are assumed to match the same text.
+    """
+
+    def get_text(self, item: Any) -> str:
+        return item
+
+    def to_regex(self) -> str | None:
+        """
+        Returns a regex that matches the same texts as this filter when used with `re.search`,
+        or None if the pattern can't be combined with others.
+        """
+        return None
+
+    def get_flags(self) -> int:
+        return 0
+
+    @classmethod
+    def is_mergeable(cls) -> bool:
+        return _method_owner(cls, "process") in MERGEABLE_PATTERN_FILTERS and _method_owner(
+            cls, "eval"
+        ) in (Filter, PatternFilter)
+
+
+class RegexFilter(PatternFilter):
     def __init__(self, pattern: str | re.Pattern, invert=False) -> None:
         self.pattern = pattern
         if isinstance(self.pattern, str):
             self.pattern = re.compile(pattern)
+        self._match = regex_matcher(self.pattern)
         super().__init__(invert)
 
-    def process(self, text: str) -> bool:
-        return re.search(self.pattern, text) is not None
+    def process(self, item: Any) -> bool:
+        return bool(self._match(self.get_text(item)))
+
+    def to_regex(self) -> str | None:
+        pattern = self.pattern.pattern  # type: ignore
+        if not isinstance(pattern, str) or _has_group_reference(pattern, self.pattern.flags):  # type: ignore
+            return None
+        return pattern
+
+    def get_flags(self) -> int:
+        return self.pattern.flags  # type: ignore
 
     @classmethod
     def parse(cls, val: str):
         return cls(val)
 
 
-class GlobFilter(Filter):
+class GlobFilter(PatternFilter):
     def __init__(self, pattern: str, invert=False) -> None:
         if pattern is None:
             raise ValueError
         self.pattern = pattern
+        self._match = glob_matcher(pattern)
         super().__init__(invert)
 
-    def process(self, text: str) -> bool:
-        return fnmatch(text, self.pattern)
+    def process(self, item: Any) -> bool:
+        return self._match(self.get_text(item))
+
+    def to_regex(self) -> str | None:
+        if os.path.normcase("A/") != "A/":  # fnmatch normalizes case and separators on this OS
+            return None
+        return r"\A" + translate(self.pattern)
+
+    def get_flags(self) -> int:
+        return re.compile("").flags
 
     @classmethod
     def parse(cls, val: str):
         return cls(val)
 
 
-class TextPatternFilter(Filter):
+class TextPatternFilter(PatternFilter):
     """A filter that can be either a glob or regex pattern."""
 
     dict_exclude = ["t", "invert"]
@@ -97,18 +176,127 @@ class TextPatternFilter(Filter):
         self.pattern = pattern
         super().__init__(invert)
 
-    def process(self, text: str) -> bool:
-        return self.inner.process(text)
+    def process(self, item: Any) -> bool:
+        return self.inner.process(self.get_text(item))
+
+    def to_regex(self) -> str | None:
+        return self.inner.to_regex()
+
+    def get_flags(self) -> int:
+        return self.inner.get_flags()
 
     @classmethod
     def parse(cls, val: str):
         return cls(val)
 
 
+class MultiPatternFilter(PatternFilter):
+    """
+    Matches text against the patterns of several pattern filters with a single regex.
+    Non-inverted filters keep items that match all patterns, inverted filters keep items that match none of them.
+    """
+
+    def __init__(self, filters: list[PatternFilter], invert=False) -> None:
+        self.filters = filters
+        patterns = [i.to_regex() for i in filters]
+        if None in patterns:
+            raise ValueError("all filters of a MultiPatternFilter must have a regex without group references")
+        if invert:
+            regex = "|".join(f"(?:{i})" for i in patterns)
+        else:
+            regex = "".join(f"(?=[\\s\\S]*?(?:{i}))" for i in patterns)
+        self.regex = re.compile(regex, filters[0].get_flags())
+        super().__init__(invert)
+
+    def get_text(self, item: Any) -> str:
+        return self.filters[0].get_text(item)
+
+    def process(self, item: Any) -> bool:
+        text = self.get_text(item)
+        if self.invert:
+            return self.regex.search(text) is not None
+        return self.regex.match(text) is not None
+
+
+MERGEABLE_PATTERN_FILTERS = (RegexFilter, GlobFilter, TextPatternFilter)
+
+
+def _has_group_reference(pattern: str, flags: int = 0) -> bool:
+    """
+    Returns True if 'pattern' refers to one of its groups by number or name (backreferences and
+    conditional groups), since these refer to the wrong groups once patterns are combined.
+    """
+    try:
+        from re import _parser as sre_parse  # type: ignore
+    except ImportError:  # Python < 3.11
+        import sre_parse  # type: ignore
+
+    references = (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS)
+
+    def search(value: Any) -> bool:
+        if isinstance(value, sre_parse.SubPattern):
+            return any(op in references or search(av) for op, av in value)
+        if isinstance(value, (list, tuple)):
+            return any(search(i) for i in value)
+        return False
+
+    return search(sre_parse.parse(pattern, flags))
+
+
+def merge_pattern_filters(actions: list[Action]) -> list[Action]:
+    """
+    Replaces runs of consecutive pattern filters with the same polarity, text and regex flags
+    with a single MultiPatternFilter, so each item is scanned once per run instead of once per pattern.
+    """
+    merged: list[Action] = []
+    run: list[PatternFilter] = []
+
+    def flush():
+        if len(run) > 1:
+            try:
+                merged.append(MultiPatternFilter(list(run), invert=run[0].invert))
+            except re.error:  # e.g. duplicate group names, or global flags inside a pattern
+                merged.extend(run)
+        else:
+            merged.extend(run)
+        run.clear()
+
+    for action in actions:
+        if not _can_merge(action):
+            flush()
+            merged.append(action)
+            continue
+        if run and not _same_run(run[0], action):  # type: ignore
+            flush()
+        run.append(action)  # type: ignore
+    flush()
+    return merged
+
+
+def _can_merge(action: Action) -> bool:
+    return (
+        isinstance(action, PatternFilter)
+        and action.is_mergeable()
+        and action.to_regex() is not None
+    )
+
+
+def _same_run(first: PatternFilter, action: PatternFilter) -> bool:
+    return (
+        action.invert == first.invert
+        and action.get_flags() == first.get_flags()
+        and type(action).get_text is type(first).get_text
+    )
+
+
 __all__ = [
     "Filter",
     "IntFilter",
     "FloatFilter",
     "RegexFilter",
     "GlobFilter",
+    "PatternFilter",
+    "TextPatternFilter",
+    "MultiPatternFilter",
+    "merge_pattern_filters",
 ]
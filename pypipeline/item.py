@@ -1,16 +1,219 @@
-from typing import Any
+from typing import Any, Hashable, Iterator, Sequence
+
+from pypipeline.lazy import numpy
 
 
 class Item:
+    __slots__ = ("discarded", "_extra")
+
     def __init__(self) -> None:
         self.discarded = False
-        self.extra: dict[str, Any] = {}
+        self._extra: dict[str, Any] | None = None
 
     def __repr__(self):
         return f"{self.__class__.__name__}(discarded={self.discarded})"
 
+    @property
+    def extra(self) -> dict[str, Any]:
+        if self._extra is None:
+            self._extra = {}
+        return self._extra
+
+    @extra.setter
+    def extra(self, value: dict[str, Any]) -> None:
+        self._extra = value
+
+    def cache_key(self) -> Hashable | None:
+        """
+        Key used to cache action results for this item, see `pypipeline.cache.ActionCache`.
+        Items with equal keys must give the same results. Returns None, which disables caching, by default.
+        """
+        return None
+
+    def dict(self) -> dict[str, Any]:
+        """
+        Returns the public attributes of the item, including `extra` if it's not empty.
+        """
+        data = {}
+        for cls in reversed(type(self).__mro__):
+            slots = cls.__dict__.get("__slots__", ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if not name.startswith("_") and hasattr(self, name):
+                    data[name] = getattr(self, name)
+        for name, value in getattr(self, "__dict__", {}).items():
+            if not name.startswith("_"):
+                data[name] = value
+        if self._extra:
+            data["extra"] = self._extra
+        return data
+
     def on_discard(self) -> None:
         return
 
 
-__all__ = ["Item"]
+class ItemBatch:
+    """
+    A batch of items stored as columns (one sequence per attribute) and a discard mask,
+    so actions that implement `process_batch` can process it without creating an object per row.
+
+    Args:
+        columns (dict[str, Sequence]): Column name to column values. All columns must have the same length.
+        discarded (Sequence[bool], optional): Initial discard mask. Defaults to all rows kept.
+    """
+
+    def __init__(self, columns: dict[str, Sequence], discarded: Sequence[bool] | None = None) -> None:
+        lengths = {len(i) for i in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"all columns must have the same length, got {sorted(lengths)}")
+        self.columns = columns
+        self.size = lengths.pop() if lengths else 0
+        if discarded is None:
+            np = numpy()
+            discarded = np.zeros(self.size, dtype=bool) if np is not None else bytearray(self.size)
+        elif len(discarded) != self.size:
+            raise ValueError(f"discard mask has {len(discarded)} rows, expected {self.size}")
+        self.discarded = discarded
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(columns={list(self.columns)}, size={self.size}, kept={self.count_kept()})"
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, column: str) -> Sequence:
+        return self.columns[column]
+
+    def __iter__(self) -> Iterator["BatchRow"]:
+        for i in range(self.size):
+            yield BatchRow(self, i)
+
+    def rows(self, kept: bool | None = True) -> Iterator["BatchRow"]:
+        """
+        Yields a view of each kept (or discarded, if 'kept' is False) row. Yields all rows if 'kept' is None.
+        """
+        for i in range(self.size):
+            if kept is None or bool(self.discarded[i]) != kept:
+                yield BatchRow(self, i)
+
+    def discard(self, mask: Sequence[bool]) -> None:
+        """
+        Mark rows where 'mask' is true as discarded. Already discarded rows stay discarded.
+        """
+        np = numpy()
+        if np is not None and isinstance(self.discarded, np.ndarray):
+            self.discarded |= np.asarray(mask, dtype=bool)
+            return
+        for i, value in enumerate(mask):
+            if value:
+                self.discarded[i] = 1
+
+    def keep_where(self, mask: Sequence[bool], invert: bool = False) -> None:
+        """
+        Discard rows where 'mask' is false (or true, if 'invert' is True).
+        """
+        np = numpy()
+        if np is not None:
+            self.discard(np.asarray(mask, dtype=bool) == invert)
+        else:
+            self.discard([bool(i) == invert for i in mask])
+
+    def count_discarded(self) -> int:
+        np = numpy()
+        if np is not None and isinstance(self.discarded, np.ndarray):
+            return int(self.discarded.sum())
+        return sum(1 for i in self.discarded if i)
+
+    def count_kept(self) -> int:
+        return self.size - self.count_discarded()
+
+    def kept_rows(self) -> Sequence[int]:
+        """
+        Returns the indices of the kept rows.
+        """
+        np = numpy()
+        if np is not None and isinstance(self.discarded, np.ndarray):
+            return np.flatnonzero(np.logical_not(self.discarded))
+        return [i for i in range(self.size) if not self.discarded[i]]
+
+    def select(self, rows: Sequence[int]) -> "ItemBatch":
+        """
+        Returns a new batch with a copy of 'rows'. All rows of the new batch are kept.
+        """
+        np = numpy()
+        columns = {}
+        for name, column in self.columns.items():
+            if np is not None and isinstance(column, np.ndarray):
+                columns[name] = column[rows]
+            else:
+                columns[name] = [column[i] for i in rows]
+        return ItemBatch(columns)
+
+    def assign(self, rows: Sequence[int], batch: "ItemBatch") -> None:
+        """
+        Write the columns of 'batch' (e.g. one returned by `select`) back to 'rows'.
+        Numpy columns are cast to a dtype that can hold the new values. New columns are added,
+        with zeros (numpy) or None in the other rows.
+        """
+        np = numpy()
+        for name, values in batch.columns.items():
+            column = self.columns.get(name)
+            if np is not None and isinstance(values, np.ndarray):
+                if column is None:
+                    column = np.zeros((self.size, *values.shape[1:]), dtype=values.dtype)
+                elif isinstance(column, np.ndarray) and column.dtype != values.dtype:
+                    column = column.astype(np.result_type(column.dtype, values.dtype))
+                if isinstance(column, np.ndarray):
+                    column[rows] = values
+                    self.columns[name] = column
+                    continue
+            if column is None:
+                column = [None] * self.size
+            elif not isinstance(column, list):
+                column = list(column)
+            for i, value in zip(rows, values):
+                column[i] = value
+            self.columns[name] = column
+
+
+class BatchRow(Item):
+    """
+    A view of a single row of an ItemBatch. Column values are accessed as attributes.
+    """
+
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch: ItemBatch, index: int) -> None:
+        object.__setattr__(self, "batch", batch)
+        object.__setattr__(self, "index", index)
+        object.__setattr__(self, "_extra", None)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(index={self.index}, discarded={self.discarded})"
+
+    def dict(self) -> dict[str, Any]:
+        data = {name: column[self.index] for name, column in self.batch.columns.items()}
+        data["discarded"] = self.discarded
+        if self._extra:
+            data["extra"] = self._extra
+        return data
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.batch.columns[name][self.index]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "discarded":
+            self.batch.discarded[self.index] = bool(value)
+        elif name in self.batch.columns:
+            self.batch.columns[name][self.index] = value  # type: ignore
+        else:
+            object.__setattr__(self, name, value)
+
+    @property
+    def discarded(self) -> bool:  # type: ignore
+        return bool(self.batch.discarded[self.index])
+
+
+__all__ = ["Item", "ItemBatch", "BatchRow"]
@@ -1,37 +1,259 @@
 import pprint
+from itertools import compress
+from typing import Iterable, Iterator
 
 from pypipeline.item import Item
 
+KEPT, DISCARDED, REMOVED = 0, 1, 2
+_INVERT = bytes.maketrans(b"\x00\x01", b"\x01\x00")
+_KEPT_MASK = bytes.maketrans(b"\x00\x01\x02", b"\x01\x00\x00")
+_DISCARDED_MASK = bytes.maketrans(b"\x00\x01\x02", b"\x00\x01\x00")
+_PRESENT_MASK = bytes.maketrans(b"\x00\x01\x02", b"\x01\x01\x00")
+
+
+class _ItemList(list):
+    """
+    The list of items of an ItemsContainer. Modifying it directly makes the container rebuild its bitmap.
+    """
+
+    def __init__(self, items: Iterable[Item], container: "ItemsContainer") -> None:
+        super().__init__(items)
+        self.container = container
+
+
+def _mutator(name: str):
+    method = getattr(list, name)
+
+    def wrapper(self, *args):
+        container = getattr(self, "container", None)  # not set yet while unpickling
+        if container is not None:
+            container._write_flags()
+        result = method(self, *args)
+        if container is not None:
+            container._changed = True
+        return result
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+class _ItemView(list):
+    """
+    A read-only list of the kept or discarded items of an ItemsContainer.
+    """
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _read_only(name: str):
+    def wrapper(self, *args):
+        raise TypeError(f"{self.__class__.__name__} is read-only, copy it with list() to modify it")
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in (
+    "append",
+    "extend",
+    "insert",
+    "remove",
+    "pop",
+    "clear",
+    "sort",
+    "reverse",
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+):
+    setattr(_ItemList, _name, _mutator(_name))
+    setattr(_ItemView, _name, _read_only(_name))
+
 
 class ItemsContainer:
-    def __init__(self, items: list[Item] | None = None) -> None:
-        self.items: list[Item] = items or []
+    """
+    A container of processed items that tracks which of them are kept or discarded in a bitmap.
 
-    def add(self, item: Item):
-        self.items.append(item)
+    Counts are O(1), `kept` and `discarded` are read-only lists that are cached until the container
+    is modified, and items can be removed in O(1) by the handle returned from `add`.
+    The bitmap is built from `Item.discarded` when items are added. Call `sync` after changing
+    the flags of items that are already in the container. `invert_discarded` only flips the bitmap;
+    the items get their new flags when they are next read from the container.
 
-    def remove(self, item: Item):
-        self.items.remove(item)
+    `items` can be modified in place or replaced. The bitmap is then rebuilt on the next access,
+    and handles returned from `add` are no longer valid.
+    """
 
-    def __iter__(self):
-        for i in self.items:
-            yield i
+    def __init__(self, items: Iterable[Item] | None = None) -> None:
+        self.items = items if items is not None else []
 
     @property
-    def discarded(self):
-        return [i for i in self.items if i.discarded]
+    def items(self) -> list[Item]:
+        if self._num_removed:
+            self._compact()
+        self._write_flags()
+        return self._items
+
+    @items.setter
+    def items(self, items: Iterable[Item]) -> None:
+        if hasattr(self, "_items"):
+            self._write_flags()
+        self._items = _ItemList(items, self)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._state = bytearray(DISCARDED if i.discarded else KEPT for i in self._items)
+        self._num_discarded = self._state.count(DISCARDED)
+        self._num_removed = 0
+        self._next_handle = len(self._items)
+        self._handle_of: list[int] | None = None  # handle of each position, None while they are equal
+        self._index: dict[int, int] | None = None  # position of each handle, None while they are equal
+        self._ids: dict[int, int] | None = None  # handle of each item by id, built on first removal by item
+        self._flags_stale = False  # set by `invert_discarded` until the flags are written to the items
+        self._changed = False
+        self._invalidate()
+
+    def _check(self) -> None:
+        if self._changed:
+            self._reset()
+
+    def _write_flags(self) -> None:
+        if not self._flags_stale:
+            return
+        for item, state in zip(self._items, self._state):
+            if item is not None:
+                item.discarded = state == DISCARDED
+        self._flags_stale = False
+
+    def _invalidate(self) -> None:
+        self._kept: _ItemView | None = None
+        self._discarded: _ItemView | None = None
+
+    def _compact(self) -> None:
+        """
+        Drop the slots of removed items. Handles stay valid.
+        """
+        present = self._state.translate(_PRESENT_MASK)
+        handles = self._handle_of if self._handle_of is not None else range(len(self._items))
+        self._handle_of = list(compress(handles, present))
+        self._index = {h: i for i, h in enumerate(self._handle_of)}
+        self._items = _ItemList(compress(self._items, present), self)
+        self._state = bytearray(self._state.translate(None, bytes([REMOVED])))
+        self._num_removed = 0
+
+    def add(self, item: Item) -> int:
+        """
+        Add an item to the container. Returns a handle that can be passed to `remove`.
+        """
+        self._check()
+        self._write_flags()
+        handle = self._next_handle
+        self._next_handle += 1
+        if self._handle_of is not None:
+            self._index[handle] = len(self._items)  # type: ignore
+            self._handle_of.append(handle)
+        list.append(self._items, item)
+        self._state.append(DISCARDED if item.discarded else KEPT)
+        if item.discarded:
+            self._num_discarded += 1
+        if self._ids is not None:
+            self._ids[id(item)] = handle
+        self._invalidate()
+        return handle
+
+    def remove(self, item: Item | int):
+        """
+        Remove an item, either by the item itself or by the handle returned from `add`.
+        """
+        self._check()
+        self._write_flags()
+        if isinstance(item, int):
+            handle = item
+        else:
+            if self._ids is None:
+                handles = self._handle_of if self._handle_of is not None else range(len(self._items))
+                self._ids = {id(i): h for h, i in zip(handles, self._items) if i is not None}
+            handle = self._ids.get(id(item), -1)
+        index = handle if self._index is None else self._index.get(handle, -1)
+        if not 0 <= index < len(self._items) or self._state[index] == REMOVED:
+            raise ValueError(f"{item} is not in the container")
+        if self._ids is not None:
+            self._ids.pop(id(self._items[index]), None)
+        if self._state[index] == DISCARDED:
+            self._num_discarded -= 1
+        self._state[index] = REMOVED
+        list.__setitem__(self._items, index, None)
+        self._num_removed += 1
+        self._invalidate()
+
+    def __iter__(self) -> Iterator[Item]:
+        self._check()
+        self._write_flags()
+        if self._num_removed == 0:
+            yield from self._items
+            return
+        for i in self._items:
+            if i is not None:
+                yield i
+
+    def __len__(self) -> int:
+        self._check()
+        return len(self._items) - self._num_removed
+
+    def count_discarded(self) -> int:
+        self._check()
+        return self._num_discarded
+
+    def count_kept(self) -> int:
+        return len(self) - self._num_discarded
 
     @property
-    def kept(self):
-        return [i for i in self.items if not i.discarded]
+    def discarded(self) -> list[Item]:
+        self._check()
+        self._write_flags()
+        if self._discarded is None:
+            self._discarded = _ItemView(compress(self._items, self._state.translate(_DISCARDED_MASK)))
+        return self._discarded
+
+    @property
+    def kept(self) -> list[Item]:
+        self._check()
+        self._write_flags()
+        if self._kept is None:
+            self._kept = _ItemView(compress(self._items, self._state.translate(_KEPT_MASK)))
+        return self._kept
 
     def invert_discarded(self):
-        for i in self.items:
-            i.discarded = not i.discarded
+        """
+        Swap kept and discarded items by flipping the bitmap.
+        The `discarded` flags of the items are updated when they're next read from the container.
+        """
+        self._check()
+        self._state = bytearray(self._state.translate(_INVERT))
+        self._num_discarded = len(self) - self._num_discarded
+        self._kept, self._discarded = self._discarded, self._kept
+        self._flags_stale = not self._flags_stale
 
     def remove_discarded(self):
+        """
+        Remove all discarded items. Handles returned from `add` are no longer valid afterwards.
+        """
         self.items = self.kept
 
+    def sync(self):
+        """
+        Rebuild the bitmap from the `discarded` flags of the items.
+        """
+        self._check()
+        self._write_flags()
+        for index, item in enumerate(self._items):
+            if item is not None:
+                self._state[index] = DISCARDED if item.discarded else KEPT
+        self._num_discarded = self._state.count(DISCARDED)
+        self._invalidate()
+
     def print(self):
         pprint.pprint(self.items)
 
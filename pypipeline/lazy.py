@@ -0,0 +1,17 @@
+from functools import cache
+from types import ModuleType
+
+
+@cache
+def numpy() -> ModuleType | None:
+    """
+    Returns the numpy module, or None if it's not installed. numpy is only imported on the first call.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+__all__ = ["numpy"]
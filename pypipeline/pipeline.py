@@ -1,28 +1,328 @@
-import multiprocessing
+import os
+import queue
+import threading
+import time
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+)
 
-from stdl.lst import split
-from tqdm import tqdm
-
-from pypipeline.action import Action
-from pypipeline.item import Item
+from pypipeline.action import Action, Filter, Modifier, _method_owner
+from pypipeline.cache import ActionCache
+from pypipeline.constants import (
+    ADAPTIVE_REORDER_INTERVAL,
+    ASYNC_CONCURRENCY,
+    BATCH_SIZE,
+    EXECUTORS,
+    MULTI_CHUNKSIZE,
+    MMAP_RANGE_SIZE,
+    MULTI_PREFETCH,
+)
+from pypipeline.filter import merge_pattern_filters
+from pypipeline.item import Item, ItemBatch
 from pypipeline.items_container import ItemsContainer
+from pypipeline.lazy import numpy
+from pypipeline.shared import SharedBatches, attach
+from pypipeline.source import line_ranges, read_range
+from pypipeline.stats import PipelineStats, WorkerStats
+from pypipeline.util import chunked
+
+
+_worker_pipeline: "Pipeline | None" = None
+
+
+def _init_worker(pipeline: "Pipeline", cancel: Any = None) -> None:
+    global _worker_pipeline
+    pipeline._cancel = cancel
+    pipeline._start_worker()
+    _worker_pipeline = pipeline
+
+
+def _call_worker(method: str, *args):
+    return getattr(_worker_pipeline, method)(*args)
+
+
+def _put_result(done: queue.Queue, seq: int, result: Any) -> None:
+    done.put((seq, result))
+
+
+def _progress_bar(desc: str) -> Any:
+    from tqdm import tqdm
+
+    return tqdm(desc=desc, leave=True)
+
+
+def _take(
+    items: Iterator[Item], limit: int | None, mode: Literal["kept", "discarded"] | None = None
+) -> Iterator[Item]:
+    """
+    Yield from 'items' until 'limit' items matching 'mode' were yielded, then close it.
+    If 'mode' is None, kept items are counted.
+    """
+    if limit is None:
+        yield from items
+        return
+    discarded = mode == "discarded"
+    found = 0
+    try:
+        if limit <= 0:
+            return
+        for item in items:
+            yield item
+            if item.discarded == discarded:
+                found += 1
+                if found >= limit:
+                    return
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+
+def _store_ranges(columns: dict[str, Any], name: str, ranges: list[tuple[int, int, Any]]) -> None:
+    """
+    Write the (start, end, rows) ranges returned by workers into 'columns[name]'.
+    If the rows of a numpy column have another dtype, the column is rebuilt from the ranges when they cover it,
+    otherwise it's cast to a dtype that can hold both.
+    """
+    column = columns[name]
+    np = numpy()
+    if np is None or not isinstance(column, np.ndarray):
+        for start, end, rows in ranges:
+            column[start:end] = rows
+        return
+    ranges = sorted((start, end, np.asarray(rows)) for start, end, rows in ranges)
+    for start, end, rows in ranges:
+        if len(rows) != end - start:
+            raise ValueError(f"actions can't change the number of rows of column '{name}'")
+    if all(rows.dtype == column.dtype and rows.shape[1:] == column.shape[1:] for _, _, rows in ranges):
+        for start, end, rows in ranges:
+            column[start:end] = rows
+        return
+    if sum(end - start for start, end, _ in ranges) == len(column):
+        columns[name] = np.concatenate([rows for _, _, rows in ranges])
+        return
+    if any(rows.shape[1:] != column.shape[1:] for _, _, rows in ranges):
+        raise ValueError(f"actions can't change the shape of column '{name}' for only some rows")
+    column = columns[name] = column.astype(np.result_type(column.dtype, *(rows.dtype for _, _, rows in ranges)))
+    for start, end, rows in ranges:
+        column[start:end] = rows
+
+
+def _copy_column(columns: dict[str, Any], name: str, column: Any) -> None:
+    """
+    Copy a processed column back into 'columns', in place if it still has the same dtype and shape.
+    """
+    target = columns[name]
+    np = numpy()
+    if np is not None and isinstance(target, np.ndarray):
+        if isinstance(column, np.ndarray) and column.dtype == target.dtype and column.shape == target.shape:
+            target[:] = column
+        else:
+            columns[name] = np.array(column)
+        return
+    target[:] = column
+
+
+def _compile_actions(
+    actions: list[Action], on_discard: bool, cache: ActionCache | None = None
+) -> Callable[[Item], Item]:
+    """
+    Generate the source of a `process_item` function specialized for 'actions' and compile it.
+    """
+    namespace: dict[str, Any] = {}
+    discard = ["        item.on_discard()"] if on_discard else []
+    lines = ["def process_item(item):", "    if item.discarded:", "        return item"]
+    for i, action in enumerate(actions):
+        if cache is not None and action.cacheable:
+            namespace[f"eval_{i}"] = partial(cache.eval, action)
+            lines += [f"    item = eval_{i}(item)", "    if item.discarded:"]
+            lines += discard + ["        return item"]
+            continue
+        own_eval = "eval" in getattr(action, "__dict__", {})
+        eval_owner = _method_owner(type(action), "eval")
+        if eval_owner is Filter and not own_eval:
+            namespace[f"process_{i}"] = action.process
+            check = "if" if action.invert else "if not"  # type: ignore
+            lines += [f"    {check} process_{i}(item):", "        item.discarded = True"]
+            lines += discard + ["        return item", "    item.discarded = False"]
+            continue
+        if eval_owner is Modifier and not own_eval:
+            namespace[f"process_{i}"] = action.process
+            lines.append(f"    item = process_{i}(item)")
+        else:
+            namespace[f"eval_{i}"] = action.eval
+            lines.append(f"    item = eval_{i}(item)")
+        lines += ["    if item.discarded:"] + discard + ["        return item"]
+    lines.append("    return item")
+    exec(compile("\n".join(lines), "<pipeline>", "exec"), namespace)
+    return namespace["process_item"]
 
 
 class Pipeline:
+    timed: bool = False
+
     def __init__(
-        self, actions: list[Action] | None = None, on_discrad=True, verbose=False
+        self,
+        actions: list[Action] | None = None,
+        on_discrad=True,
+        verbose=False,
+        executor: Literal["serial", "threads", "processes"] = "processes",
+        profile=False,
+        cache: ActionCache | None = None,
     ) -> None:
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor must be one of: {', '.join(EXECUTORS)}")
         self.actions: list[Action] = []
         if actions:
+            for action in actions:
+                self.check_action(action)
             self.actions.extend(actions)
-        self.lock = multiprocessing.Manager().Lock()
         self.on_discard = on_discrad
         self.verbose = verbose
+        self.executor = executor
+        self.worker_stats: list[WorkerStats] = []
+        self.stats = PipelineStats() if profile else None
+        self.cache = cache
+        self._pool = None
+        self._pool_size = 0
+        self._cancel = None
+        self._shared = SharedBatches()
+        self._compiled = False
         if not self.verbose:
             self.process = self.process_no_bar
+        if self.stats is not None or self.timed:
+            self.process_item = self._process_item_timed
+            self.process_item_batch = self._process_item_batch_timed
+        elif self.cache is not None:
+            self.process_item = self._process_item_cached
+            self.process_item_batch = self._process_item_batch_each
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_pool_size"] = 0
+        state["_cancel"] = None
+        state["_shared"] = SharedBatches()
+        if self._compiled:
+            del state["process_item"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._compiled:
+            self.compile()
 
     def add_action(self, action: Action):
+        self.check_action(action)
         self.actions.append(action)
+        self._close_pool()
+        self._recompile()
+
+    def merge_pattern_filters(self):
+        """
+        Merge runs of consecutive pattern filters into single filters that match all of their patterns with one regex.
+        See `pypipeline.filter.merge_pattern_filters`.
+        """
+        self.actions = merge_pattern_filters(self.actions)
+        self._close_pool()
+        self._recompile()
+
+    def compile(self) -> Callable[[Item], Item]:
+        """
+        Replace `process_item` with a single function generated for the current actions.
+        Filters and modifiers that don't override `eval` have their `process` method called directly,
+        with the invert check inlined, so each item skips the per-action dispatch of the interpreted loop.
+        The results are the same as the interpreted `process_item`.
+
+        Actions are bound when the pipeline is compiled. Adding or merging actions recompiles it,
+        changing an action in place requires calling `compile` again.
+        If none of the actions implement `process_batch`, chunks sent to workers are processed with it too.
+        Pipelines that time their actions keep the timed `process_item`.
+
+        Returns:
+            Callable[[Item], Item]: The compiled `process_item`.
+        """
+        if self.stats is not None or self.timed:
+            return self.process_item
+        self.process_item = _compile_actions(self.actions, self.on_discard, self.cache)
+        if self.cache is None and any(i.has_batch() for i in self.actions):
+            self.__dict__.pop("process_item_batch", None)
+        else:
+            self.process_item_batch = self._process_item_batch_each
+        self._compiled = True
+        return self.process_item
+
+    def _process_item_batch_each(self, items: list[Item]) -> list[Item]:
+        process_item = self.process_item
+        return [process_item(i) for i in items]
+
+    def _recompile(self) -> None:
+        if self._compiled:
+            self.compile()
+
+    def check_action(self, action: Action) -> None:
+        if action.is_async():
+            raise TypeError(
+                f"{action.__class__.__name__} has an async process method, use AsyncPipeline instead"
+            )
+
+    def start(self, t: int):
+        """
+        Start the worker pool used by process_multi, or reuse it if it's already running with 't' workers.
+        With the "processes" executor, the pipeline is sent to each worker once, when the worker starts.
+        With the "threads" executor, workers share the pipeline and items are never pickled.
+        """
+        if self._pool is not None and self._pool_size == t:
+            return self._pool
+        self._close_pool()
+        import multiprocessing
+
+        if self.executor == "threads":
+            from multiprocessing.pool import ThreadPool
+
+            self._cancel = threading.Event()
+            self._pool = ThreadPool(t)
+        else:
+            if self.cache is not None:
+                self.cache.sync()  # workers open the disk cache themselves
+            self._cancel = multiprocessing.Event()
+            self._pool = multiprocessing.Pool(
+                t, initializer=_init_worker, initargs=(self, self._cancel)
+            )
+        self._pool_size = t
+        return self._pool
+
+    def close(self):
+        """
+        Shut down the worker pool and wait for the workers to exit.
+        Pending results of the cache are written to disk and batches from `share` are released.
+        """
+        if self.cache is not None:
+            self.cache.sync()
+        self._shared.release_all()
+        self._close_pool()
+
+    def _close_pool(self):
+        if self._pool is None:
+            return
+        self._pool.close()
+        self._pool.join()
+        self._pool = None
+        self._pool_size = 0
+        self._cancel = None
 
     def process_item(self, item: Item) -> Item:
         if item.discarded:
@@ -35,59 +335,560 @@ class Pipeline:
                 return item
         return item
 
-    def process(self, items: list, _pos: int = 0):
+    def process_item_batch(self, items: list[Item]) -> list[Item]:
+        """
+        Process a batch of items, passing it to each action as a whole.
+        Actions that implement `process_batch` handle the batch in a single call, others get items one by one.
+        """
+        results = list(items)
+        live = [i for i, item in enumerate(results) if not item.discarded]
+        for action in self.actions:
+            if not live:
+                break
+            processed = action.eval_batch([results[i] for i in live])
+            remaining = []
+            for i, item in zip(live, processed):
+                results[i] = item
+                if not item.discarded:
+                    remaining.append(i)
+                elif self.on_discard:
+                    item.on_discard()
+            live = remaining
+        return results
+
+    def process_columns(self, batch: ItemBatch) -> ItemBatch:
+        """
+        Process an ItemBatch in place, passing it to each action as a whole.
+        Actions without `process_batch` are evaluated on a view of each kept row.
+        `Item.on_discard` is not called for rows of a batch.
+        """
+        for action in self.actions:
+            if batch.count_kept() == 0:
+                break
+            batch = action.eval_columns(batch)
+        return batch
+
+    def share(self, batch: ItemBatch) -> ItemBatch:
+        """
+        Copy the numeric columns and the discard mask of 'batch' into shared memory,
+        so `process_columns_multi` can send it to process workers without pickling it.
+        The shared batch stays valid until it's passed to `release` or the pipeline is closed.
+        See `pypipeline.shared.SharedBatches`.
+
+        Returns:
+            ItemBatch: A batch backed by shared memory.
+        """
+        return self._shared.share(batch)
+
+    def release(self, batch: ItemBatch) -> None:
+        """
+        Free the shared memory of a batch returned by `share`.
+        """
+        self._shared.release(batch)
+
+    def process_columns_multi(self, batch: ItemBatch, t: int, chunksize: int = BATCH_SIZE) -> ItemBatch:
+        """
+        Process an ItemBatch in place in parallel, with each worker processing a range of 'chunksize' rows.
+
+        With the "processes" executor, the shared columns and discard mask of a batch from `share`
+        are updated by the workers directly; only columns that aren't shared and columns that an action
+        replaced are sent between processes. Other batches are copied into shared memory for the call.
+        Actions must not add columns.
+
+        Args:
+            batch (ItemBatch): Batch to be processed.
+            t (int): The number of workers to use for processing.
+            chunksize (int, optional): The number of rows processed by a worker at once.
+
+        Returns:
+            ItemBatch: The processed batch.
+        """
+        if self.executor == "serial":
+            return self.process_columns(batch)
+        if self.executor == "processes" and batch not in self._shared:
+            shared = self.share(batch)
+            try:
+                self.process_columns_multi(shared, t, chunksize)
+                for name, column in shared.columns.items():
+                    if column is not batch.columns[name]:
+                        _copy_column(batch.columns, name, column)
+                batch.discarded[:] = shared.discarded
+            finally:
+                self.release(shared)
+            return batch
+
+        handles = self._shared.handles(batch) if batch in self._shared else {}
+        ranges = ((i, min(i + chunksize, batch.size)) for i in range(0, batch.size, chunksize))
+        tasks = (
+            (
+                handles,
+                {name: col[start:end] for name, col in batch.columns.items() if name not in handles},
+                None if None in handles else batch.discarded[start:end],
+                start,
+                end,
+            )
+            for start, end in ranges
+        )
+        results = self._run_tasks("_process_column_range", tasks, t, ordered=False)
+        changed: dict[str, list[tuple[int, int, Any]]] = {}
+        for start, end, columns, discarded in results:  # type: ignore
+            for name, column in columns.items():
+                if name not in batch.columns:
+                    raise ValueError(f"actions can't add columns to a batch, got '{name}'")
+                changed.setdefault(name, []).append((start, end, column))
+            if discarded is not None:
+                batch.discarded[start:end] = discarded
+        for name, ranges in changed.items():
+            _store_ranges(batch.columns, name, ranges)
+        return batch
+
+    def _process_column_range(
+        self,
+        handles: dict,
+        columns: dict[str, Any],
+        discarded: Any,
+        start: int,
+        end: int,
+    ) -> tuple[int, float, int, list[tuple], Any, tuple[int, int] | None]:
+        task_start = time.perf_counter()
+        if self._cancelled():
+            return self._task_result(task_start, 0, [], None)
+        arrays = attach(handles)
+        shared = {name: arrays[name][start:end] for name in handles if name is not None}
+        if discarded is None:
+            discarded = arrays[None][start:end]
+        batch = self.process_columns(ItemBatch({**columns, **shared}, discarded))
+        changed = {
+            name: column
+            for name, column in batch.columns.items()
+            if name not in shared or column is not shared[name]
+        }
+        mask = None if None in handles and batch.discarded is discarded else batch.discarded
+        result = (start, end, changed, mask)
+        return self._task_result(task_start, end - start, [result], None)  # type: ignore
+
+    def _process_item_cached(self, item: Item) -> Item:
+        if item.discarded:
+            return item
+        for action in self.actions:
+            item = self.cache.eval(action, item)  # type: ignore
+            if item.discarded:
+                if self.on_discard:
+                    item.on_discard()
+                return item
+        return item
+
+    def _process_item_timed(self, item: Item) -> Item:
+        if item.discarded:
+            return item
+        cache = self.cache
+        for action in self.actions:
+            start = time.perf_counter()
+            try:
+                item = action.eval(item) if cache is None else cache.eval(action, item)
+            except Exception:
+                self._record_error(action)
+                raise
+            self._record(action, time.perf_counter() - start, 1, int(not item.discarded))
+            if item.discarded:
+                if self.on_discard:
+                    item.on_discard()
+                break
+        self._on_processed(1)
+        return item
+
+    def _process_item_batch_timed(self, items: list[Item]) -> list[Item]:
+        if self.cache is not None:
+            return self._process_item_batch_each(items)
+        results = list(items)
+        live = [i for i, item in enumerate(results) if not item.discarded]
+        for action in self.actions:
+            if not live:
+                break
+            start = time.perf_counter()
+            try:
+                processed = action.eval_batch([results[i] for i in live])
+            except Exception:
+                self._record_error(action)
+                raise
+            duration = time.perf_counter() - start
+            remaining = []
+            for i, item in zip(live, processed):
+                results[i] = item
+                if not item.discarded:
+                    remaining.append(i)
+                elif self.on_discard:
+                    item.on_discard()
+            self._record(action, duration, len(live), len(remaining))
+            live = remaining
+        self._on_processed(len(results))
+        return results
+
+    def _record(self, action: Action, duration: float, calls: int, passed: int) -> None:
+        if self.stats is not None:
+            self.stats.record(action, duration, calls, passed)
+
+    def _record_error(self, action: Action) -> None:
+        if self.stats is not None:
+            self.stats.record_error(action)
+
+    def _on_processed(self, n: int) -> None:
+        return
+
+    def process(self, items: list, limit: int | None = None):
         """
         Process a list of items through the pipeline.
 
         Args:
             items (list): A list of items to be processed.
-            _pos (int, optional): The position of the progress bar. Don't modify, only used for process_multi.
+            limit (int, optional): Stop once this many items were kept.
 
         Returns:
             ItemsContainer: A container of processed items.
 
         """
-        with self.lock:
-            bar = tqdm(desc=f"[{_pos+1}]", total=len(items), position=_pos, leave=True)
+        from tqdm import tqdm
+
+        with tqdm(desc="[1]", total=len(items), leave=True) as bar:
+            return self.process_no_bar(items, limit, bar.update)
+
+    def process_no_bar(
+        self, items: list, limit: int | None = None, on_item: Callable[[int], Any] | None = None
+    ):
+        """
+        Same as process, but without a progress bar.
+        """
+        if limit is None and on_item is None:
+            return ItemsContainer([self.process_item(item) for item in items])
         results = []
+        kept = 0
         for item in items:
-            results.append(self.process_item(item))
-            with self.lock:
-                bar.update(1)
+            item = self.process_item(item)
+            results.append(item)
+            if on_item is not None:
+                on_item(1)
+            if limit is not None and not item.discarded:
+                kept += 1
+                if kept >= limit:
+                    break
         return ItemsContainer(results)
 
-    def process_no_bar(self, items: list, _pos: int = 0):
+    def process_iter(
+        self,
+        items: Iterable[Item],
+        mode: Literal["kept", "discarded"] | None = None,
+        limit: int | None = None,
+    ) -> Iterator[Item]:
         """
-        Same as process, but without a progress bar.
+        Lazily process items from any iterable, yielding each item as soon as it's processed.
+        Items are pulled from the iterable one at a time, so memory usage doesn't grow with the input.
+
+        Args:
+            items (Iterable[Item]): An iterable of items to be processed.
+            mode (str, optional): Only yield "kept" or "discarded" items. If None, all items are yielded.
+            limit (int, optional): Stop after this many items matching 'mode' (kept items if 'mode' is None).
+
+        Yields:
+            Item: Processed items.
+
+        """
+        if limit is not None:
+            yield from _take(self.process_iter(items, mode), limit, mode)
+            return
+        if self.verbose:
+            from tqdm import tqdm
+
+            items = tqdm(items, desc="[1]", leave=True)
+        for item in items:
+            item = self.process_item(item)
+            if mode is None or item.discarded == (mode == "discarded"):
+                yield item
+
+    def process_batches(
+        self,
+        items: Iterable[Item],
+        batch_size: int = BATCH_SIZE,
+        mode: Literal["kept", "discarded"] | None = None,
+    ) -> Iterator[Item]:
+        """
+        Lazily process items in batches of 'batch_size' using `process_item_batch`.
+
+        Args:
+            items (Iterable[Item]): Items to be processed.
+            batch_size (int, optional): The number of items passed to each action at once.
+            mode (str, optional): Only yield "kept" or "discarded" items. If None, all items are yielded.
+
+        Yields:
+            Item: Processed items.
+
         """
-        return ItemsContainer([self.process_item(item) for item in items])
+        for batch in chunked(items, batch_size):
+            for item in self.process_item_batch(batch):
+                if mode is None or item.discarded == (mode == "discarded"):
+                    yield item
 
-    def process_multi(self, items: list[Item], t: int):
+    def process_multi(
+        self,
+        items: Iterable[Item],
+        t: int,
+        chunksize: int = MULTI_CHUNKSIZE,
+        limit: int | None = None,
+        ordered: bool = True,
+    ) -> ItemsContainer:
         """
-        Process a list of items in parallel using multiple threads.
+        Process items in parallel using the pipeline's executor.
+        The worker pool is kept alive between calls until `close` is called or the pipeline is used as a context manager.
 
         Args:
-            items (list[PipelineItem]): A list of items to be processed.
-            t (int): The number of threads to use for processing.
+            items (Iterable[Item]): Items to be processed.
+            t (int): The number of workers to use for processing.
+            chunksize (int, optional): The number of items sent to a worker at once.
+            limit (int, optional): Stop once this many items were kept.
+            ordered (bool, optional): Keep the input order. If False, items are returned in the order they were processed.
 
         Returns:
             ItemsContainer: A container of processed items.
 
         """
-        pool = multiprocessing.Pool(t)
-        list_chunks = split(items, t)
-        rvals = []
-        for pos, chunk in enumerate(list_chunks):
-            rvals.append(
-                pool.apply_async(
-                    self.process,
-                    args=(chunk, pos),
-                )
-            )
-        results = []
-        for chunk in rvals:
-            results.extend(chunk.get())
-        return ItemsContainer(results)
+        return ItemsContainer(
+            list(self.process_multi_iter(items, t, chunksize, limit=limit, ordered=ordered))
+        )
+
+    def process_multi_iter(
+        self,
+        items: Iterable[Item],
+        t: int,
+        chunksize: int = MULTI_CHUNKSIZE,
+        mode: Literal["kept", "discarded"] | None = None,
+        limit: int | None = None,
+        ordered: bool = True,
+    ) -> Iterator[Item]:
+        """
+        Process items in parallel, yielding them in input order as they are processed.
+
+        Items are split into small chunks that are put on a queue shared by all workers,
+        so a worker that finishes a chunk immediately picks up the next one.
+        At most `t * MULTI_PREFETCH` chunks are in flight at any time.
+        In verbose mode, a single progress bar in the parent process is advanced once per finished chunk.
+        Per-worker busy and idle times are available in `worker_stats` after the run.
+        With the "serial" executor, this is the same as `process_iter`.
+
+        Once 'limit' items were found, no more items are pulled from 'items' and chunks
+        that were sent to workers but not processed yet are cancelled.
+        With 'ordered' set to False, the items of each chunk are yielded as soon as the chunk is done,
+        so the first matches are found sooner, but the input order is lost.
+
+        Args:
+            items (Iterable[Item]): Items to be processed.
+            t (int): The number of workers to use for processing.
+            chunksize (int, optional): The number of items sent to a worker at once.
+            mode (str, optional): Only yield "kept" or "discarded" items. If None, all items are yielded.
+            limit (int, optional): Stop after this many items matching 'mode' (kept items if 'mode' is None).
+            ordered (bool, optional): Yield items in input order.
+
+        Yields:
+            Item: Processed items.
+
+        """
+        if self.executor == "serial":
+            yield from self.process_iter(items, mode=mode, limit=limit)
+            return
+
+        tasks = ((chunk, mode) for chunk in chunked(items, chunksize))
+        yield from _take(self._run_tasks("_process_chunk", tasks, t, ordered), limit, mode)
+
+    def process_file_iter(
+        self,
+        path: str,
+        collect: Callable[[list[str]], list[Item]],
+        t: int,
+        range_size: int = MMAP_RANGE_SIZE,
+        mode: Literal["kept", "discarded"] | None = None,
+        limit: int | None = None,
+        ordered: bool = True,
+    ) -> Iterator[Item]:
+        """
+        Process a newline-delimited file of items in parallel, yielding items in file order.
+
+        The file is split into byte ranges that end at line boundaries. Each worker memory-maps the file,
+        reads the lines of its own range and turns them into items with 'collect', so the file contents
+        never pass through the parent process. 'collect' must be picklable for the "processes" executor.
+
+        Args:
+            path (str): Path to the file.
+            collect (Callable[[list[str]], list[Item]]): Creates items from a list of lines.
+            t (int): The number of workers to use for processing.
+            range_size (int, optional): Approximate size of a range in bytes.
+            mode (str, optional): Only yield "kept" or "discarded" items. If None, all items are yielded.
+            limit (int, optional): Stop after this many items matching 'mode' (kept items if 'mode' is None).
+            ordered (bool, optional): Yield items in file order. If False, ranges are yielded as soon as they are done.
+
+        Yields:
+            Item: Processed items.
+
+        """
+        tasks = ((path, start, end, collect, mode) for start, end in line_ranges(path, range_size))
+        if self.executor == "serial":
+            results = (item for task in tasks for item in self._process_range(*task)[3])
+            yield from _take(results, limit, mode)
+            return
+        yield from _take(self._run_tasks("_process_range", tasks, t, ordered), limit, mode)
+
+    def _run_tasks(
+        self, method: str, tasks: Iterator[tuple], t: int, ordered: bool = True
+    ) -> Iterator[Item]:
+        """
+        Run 'tasks' on the worker pool, keeping at most `t * MULTI_PREFETCH` of them in flight.
+        If the generator is closed early, the tasks that haven't started yet are cancelled.
+
+        With 'ordered', results that finish before an earlier task are kept in a reorder buffer.
+        Buffered results count as in flight, so the buffer never holds more than `t * MULTI_PREFETCH` tasks;
+        a slow task stalls new submissions instead of growing the buffer.
+        """
+        pool = self.start(t)
+        cancel = self._cancel
+        cancel.clear()  # type: ignore
+        done: queue.Queue = queue.Queue()
+        tasks = enumerate(tasks)  # type: ignore
+        max_in_flight = t * MULTI_PREFETCH
+        reorder_buffer: dict[int, list[Item]] = {}
+        worker_stats: dict[int, WorkerStats] = {}
+        in_flight, pending, next_seq, exhausted = 0, 0, 0, False
+        bar = _progress_bar("[multi]") if self.verbose else None
+        start = time.perf_counter()
+
+        try:
+            while True:
+                while not exhausted and in_flight < max_in_flight:
+                    try:
+                        seq, task = next(tasks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if self.executor == "threads":
+                        fn, args = getattr(self, method), task
+                    else:
+                        fn, args = _call_worker, (method, *task)
+                    pool.apply_async(
+                        fn,
+                        args=args,
+                        callback=partial(_put_result, done, seq),
+                        error_callback=partial(_put_result, done, seq),
+                    )
+                    in_flight += 1
+                    pending += 1
+                if in_flight == 0:
+                    break
+
+                seq, res = done.get()
+                pending -= 1
+                if isinstance(res, BaseException):
+                    raise res
+                worker, busy, processed, results, state, cache_counts = res
+                worker_stats.setdefault(worker, WorkerStats(worker)).add_chunk(processed, busy)
+                if state is not None:
+                    self._merge_worker_state(state)
+                if cache_counts is not None:
+                    self.cache.add_counts(*cache_counts)  # type: ignore
+                if bar is not None:
+                    bar.update(processed)
+
+                if not ordered:
+                    in_flight -= 1
+                    yield from results
+                    continue
+                reorder_buffer[seq] = results
+                while next_seq in reorder_buffer:
+                    yield from reorder_buffer.pop(next_seq)
+                    next_seq += 1
+                    in_flight -= 1
+        finally:
+            if pending:  # wait for cancelled tasks, so they don't run after the next call clears 'cancel'
+                cancel.set()  # type: ignore
+                for _ in range(pending):
+                    done.get()
+                cancel.clear()  # type: ignore
+            if bar is not None:
+                bar.close()
+            wall = time.perf_counter() - start
+            for stats in worker_stats.values():
+                stats.idle = max(wall - stats.busy, 0.0)
+            self.worker_stats = list(worker_stats.values())
+
+    def _cancelled(self) -> bool:
+        return self._cancel is not None and self._cancel.is_set()
+
+    def _process_chunk(
+        self, chunk: list[Item], mode: Literal["kept", "discarded"] | None = None
+    ) -> tuple[int, float, int, list[Item], Any, tuple[int, int] | None]:
+        start = time.perf_counter()
+        if self._cancelled():
+            return self._task_result(start, 0, [], mode)
+        results = self.process_item_batch(chunk)
+        return self._task_result(start, len(chunk), results, mode)
+
+    def _process_range(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        collect: Callable[[list[str]], list[Item]],
+        mode: Literal["kept", "discarded"] | None = None,
+    ) -> tuple[int, float, int, list[Item], Any, tuple[int, int] | None]:
+        task_start = time.perf_counter()
+        if self._cancelled():
+            return self._task_result(task_start, 0, [], mode)
+        items = collect(read_range(path, start, end)) or []
+        results = self.process_item_batch(items)
+        return self._task_result(task_start, len(items), results, mode)
+
+    def _task_result(
+        self,
+        start: float,
+        processed: int,
+        results: list[Item],
+        mode: Literal["kept", "discarded"] | None,
+    ) -> tuple[int, float, int, list[Item], Any, tuple[int, int] | None]:
+        if mode is not None:
+            discarded = mode == "discarded"
+            results = [i for i in results if i.discarded == discarded]
+        busy = time.perf_counter() - start
+        if self.executor != "processes":  # stats and cache are shared with the parent
+            return threading.get_ident(), busy, processed, results, None, None
+        cache_counts = None
+        if self.cache is not None:
+            self.cache.sync()
+            cache_counts = self.cache.take_counts()
+        return os.getpid(), busy, processed, results, self._take_worker_state(), cache_counts
+
+    def _start_worker(self) -> None:
+        """
+        Called in each worker process when it starts, so it only sends back what it records itself.
+        """
+        if self.stats is not None:
+            self.stats = PipelineStats()
+        if self.cache is not None:
+            self.cache.take_counts()
+
+    def _take_worker_state(self) -> Any:
+        """
+        Returns what this worker recorded since the last call, to be sent to the parent with a chunk.
+        """
+        stats = self.stats
+        if stats is not None:
+            self.stats = PipelineStats()
+        return stats
+
+    def _merge_worker_state(self, state: Any) -> None:
+        """
+        Add the result of `_take_worker_state` in a worker to this pipeline.
+        """
+        self.stats.merge(state)  # type: ignore
+
+    def print_worker_stats(self):
+        print("Worker stats:")
+        for i in self.worker_stats:
+            print(f"\t{i} utilization={i.utilization:.1%}")
 
     def print_actions(self):
         print("Pipeline actions:")
@@ -100,13 +901,333 @@ class PriorityPipeline(Pipeline):
     A subclass of Pipeline that sorts the pipeline actions by priority
     """
 
-    def __init__(self, actions: list[Action] | None = None) -> None:
-        super().__init__(actions)
+    def __init__(self, actions: list[Action] | None = None, **kwargs) -> None:
+        super().__init__(actions, **kwargs)
         self.actions.sort()
 
     def add_action(self, action: Action):
         super().add_action(action)
         self.actions.sort()
+        self._recompile()
+
+
+class AdaptivePipeline(Pipeline):
+    """
+    A subclass of Pipeline that reorders filters based on their measured cost and selectivity.
+
+    Every 'reorder_interval' items, each run of consecutive filters is sorted so that filters
+    that are cheap and discard many items run first. Modifiers are never moved and filters
+    are never moved across a modifier. With the "processes" executor, each worker adapts
+    its own copy of the pipeline and sends its measurements back with each chunk, so the order
+    shown by `print_actions` is chosen from the measurements of all workers.
+    """
+
+    timed = True
+
+    def __init__(
+        self,
+        actions: list[Action] | None = None,
+        reorder_interval: int = ADAPTIVE_REORDER_INTERVAL,
+        **kwargs,
+    ) -> None:
+        super().__init__(actions, **kwargs)
+        self.reorder_interval = reorder_interval
+        self._processed = 0
+        self._keys: dict[int, int] = {}  # id of each action -> key of its counters
+        self._counters: dict[int, list[float]] = {}  # calls, time, passed
+        self._pending: dict[int, list[float]] | None = None  # measurements not sent to the parent yet
+        self._pending_items = 0
+        self.reset_counters()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_keys"] = [self._keys[id(i)] for i in self.actions]  # ids change when unpickled
+        return state
+
+    def __setstate__(self, state):
+        keys = state.pop("_keys")
+        super().__setstate__(state)
+        self._keys = {id(action): key for action, key in zip(self.actions, keys)}
+        self._counters = {key: [0, 0.0, 0] for key in keys}
+
+    def add_action(self, action: Action):
+        super().add_action(action)
+        self.reset_counters()
+
+    def merge_pattern_filters(self):
+        super().merge_pattern_filters()
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        self._keys = {id(action): key for key, action in enumerate(self.actions)}
+        self._counters = {key: [0, 0.0, 0] for key in self._keys.values()}
+
+    def rank(self, action: Action) -> float:
+        """
+        Expected cost of discarding an item with this action. Lower ranks run first.
+        """
+        calls, total, passed = self._counters[self._keys[id(action)]]
+        if calls == 0:
+            return 0.0
+        discard_rate = 1 - passed / calls
+        if discard_rate == 0:
+            return float("inf")
+        return (total / calls) / discard_rate
+
+    def reorder(self) -> None:
+        actions, run = [], []
+        for action in self.actions:
+            if action.type == "filter":
+                run.append(action)
+                continue
+            actions.extend(sorted(run, key=self.rank))
+            actions.append(action)
+            run = []
+        actions.extend(sorted(run, key=self.rank))
+        self.actions = actions
+        for counter in self._counters.values():  # decay, so the order follows changes in the input
+            counter[0] /= 2
+            counter[1] /= 2
+            counter[2] /= 2
+
+    def _on_processed(self, n: int) -> None:
+        if self._pending is not None:
+            self._pending_items += n
+        before = self._processed
+        self._processed += n
+        if self._processed // self.reorder_interval > before // self.reorder_interval:
+            self.reorder()
+
+    def _record(self, action: Action, duration: float, calls: int, passed: int) -> None:
+        key = self._keys[id(action)]
+        counter = self._counters[key]
+        counter[0] += calls
+        counter[1] += duration
+        counter[2] += passed
+        if self._pending is not None:
+            pending = self._pending.setdefault(key, [0, 0.0, 0])
+            pending[0] += calls
+            pending[1] += duration
+            pending[2] += passed
+        super()._record(action, duration, calls, passed)
+
+    def _start_worker(self) -> None:
+        """
+        Called in each worker process when it starts, so it only sends back what it records itself.
+        """
+        if self.stats is not None:
+            self.stats = PipelineStats()
+        if self.cache is not None:
+            self.cache.take_counts()
+
+    def _start_worker(self) -> None:
+        super()._start_worker()
+        self._pending = {}
+        self._pending_items = 0
+
+    def _take_worker_state(self) -> Any:
+        state = super()._take_worker_state(), self._pending, self._pending_items
+        self._pending = {}
+        self._pending_items = 0
+        return state
+
+    def _merge_worker_state(self, state: Any) -> None:
+        stats, pending, items = state
+        if stats is not None:
+            super()._merge_worker_state(stats)
+        for key, (calls, total, passed) in pending.items():
+            counter = self._counters[key]
+            counter[0] += calls
+            counter[1] += total
+            counter[2] += passed
+        self._on_processed(items)
+
+    def print_actions(self):
+        print("Pipeline actions:")
+        for i in self.actions:
+            calls, total, passed = self._counters[self._keys[id(i)]]
+            if calls == 0:
+                print(f"\t{i}")
+                continue
+            print(
+                f"\t{i} cost={total / calls * 1e6:.2f}us pass_rate={passed / calls:.1%}"
+            )
+
+
+class AsyncPipeline(Pipeline):
+    """
+    A subclass of Pipeline that supports actions with an async process method.
+    Sync and async actions can be mixed. Use `process_async` to process items concurrently on one event loop.
+
+    The sync methods (`process`, `process_multi`, ...) run items on an event loop in a background thread
+    that is started on first use and stopped by `close`. Items of a chunk are processed concurrently.
+    The action cache isn't supported, since cached results can't be awaited.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        if self.cache is not None:
+            raise ValueError("AsyncPipeline doesn't support an action cache")
+        if self.stats is not None or self.timed:
+            self.process_item_async = self._process_item_async_timed
+        self._loop: Any = None
+        self._loop_thread: threading.Thread | None = None
+        self._loop_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_loop"] = None
+        state["_loop_thread"] = None
+        del state["_loop_lock"]
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._loop_lock = threading.Lock()
+
+    def check_action(self, action: Action) -> None:
+        return
+
+    def compile(self) -> Callable[[Item], Item]:
+        """
+        Async actions are awaited one by one, so AsyncPipeline is never compiled.
+        """
+        return self.process_item
+
+    def close(self):
+        super().close()
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()  # type: ignore
+            loop.close()
+
+    def _run(self, coro: Any) -> Any:
+        """
+        Run a coroutine on the event loop of the pipeline and wait for its result.
+        Can be called from any thread, including one that runs another event loop.
+        """
+        import asyncio
+
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._loop_thread.start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def process_item(self, item: Item) -> Item:
+        return self._run(self.process_item_async(item))
+
+    def process_item_batch(self, items: list[Item]) -> list[Item]:
+        return self._run(self._process_batch_async(items))
+
+    # timing is done by `_process_item_async_timed`
+    _process_item_timed = process_item
+    _process_item_batch_timed = process_item_batch
+
+    async def _process_batch_async(self, items: list[Item]) -> list[Item]:
+        import asyncio
+
+        return list(await asyncio.gather(*(self.process_item_async(i) for i in items)))
+
+    async def process_item_async(self, item: Item) -> Item:
+        if item.discarded:
+            return item
+        for action in self.actions:
+            item = await action.eval_async(item)
+            if item.discarded:
+                if self.on_discard:
+                    item.on_discard()
+                return item
+        return item
+
+    async def _process_item_async_timed(self, item: Item) -> Item:
+        if item.discarded:
+            return item
+        for action in self.actions:
+            start = time.perf_counter()
+            try:
+                item = await action.eval_async(item)
+            except Exception:
+                self._record_error(action)
+                raise
+            self._record(action, time.perf_counter() - start, 1, int(not item.discarded))
+            if item.discarded:
+                if self.on_discard:
+                    item.on_discard()
+                break
+        self._on_processed(1)
+        return item
+
+    async def process_async(
+        self,
+        items: AsyncIterable[Item] | Iterable[Item],
+        concurrency: int = ASYNC_CONCURRENCY,
+        mode: Literal["kept", "discarded"] | None = None,
+        ordered: bool = False,
+    ) -> AsyncIterator[Item]:
+        """
+        Process items concurrently, yielding each item as soon as it's processed.
+
+        Args:
+            items (AsyncIterable[Item] | Iterable[Item]): Items to be processed.
+            concurrency (int, optional): The maximum number of items processed or waiting to be yielded at the same time.
+            mode (str, optional): Only yield "kept" or "discarded" items. If None, all items are yielded.
+            ordered (bool, optional): Yield items in input order instead of order of completion.
+
+        Yields:
+            Item: Processed items, in order of completion unless 'ordered' is set.
+
+        """
+        import asyncio
+
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        it = aiter(items) if isinstance(items, AsyncIterable) else _aiter_sync(items)
+        pending: set[asyncio.Future] = set()
+        seqs: dict[asyncio.Future, int] = {}
+        reorder_buffer: dict[int, Item] = {}
+        next_seq, submitted, exhausted = 0, 0, False
+        try:
+            while True:
+                while not exhausted and len(pending) + len(reorder_buffer) < concurrency:
+                    try:
+                        item = await anext(it)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    task = asyncio.ensure_future(self.process_item_async(item))
+                    pending.add(task)
+                    seqs[task] = submitted
+                    submitted += 1
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                finished = []
+                for task in done:
+                    seq = seqs.pop(task)
+                    if not ordered:
+                        finished.append(task.result())
+                        continue
+                    reorder_buffer[seq] = task.result()
+                    while next_seq in reorder_buffer:
+                        finished.append(reorder_buffer.pop(next_seq))
+                        next_seq += 1
+                for item in finished:
+                    if mode is None or item.discarded == (mode == "discarded"):
+                        yield item
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+async def _aiter_sync(items: Iterable[Item]) -> AsyncIterator[Item]:
+    for item in items:
+        yield item
 
 
-__all__ = ["Pipeline", "PriorityPipeline"]
+__all__ = ["Pipeline", "PriorityPipeline", "AdaptivePipeline", "AsyncPipeline"]
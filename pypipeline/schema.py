@@ -0,0 +1,258 @@
+import inspect
+import json
+import os
+import sys
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Callable, Dict, Type
+
+from pypipeline.constants import RESERVED_FLAGS
+
+if TYPE_CHECKING:
+    from pypipeline.action import Action
+
+SCHEMA_CACHE_VERSION = 1
+
+_EMPTY = inspect.Parameter.empty
+_VARIADIC = (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+
+
+class ActionParam:
+    """
+    A parameter of an action's `__init__` or `parse` method.
+    If the parameter isn't annotated, its type is the type of its default value.
+    """
+
+    def __init__(self, name: str, type: Any = _EMPTY, default: Any = _EMPTY) -> None:
+        self.name = name
+        self.type = type
+        self.default = default
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name}, type={self.type}, default={self.default})"
+
+    @property
+    def is_optional(self) -> bool:
+        return self.default is not _EMPTY
+
+    @classmethod
+    def from_parameter(cls, param: inspect.Parameter) -> "ActionParam":
+        type = param.annotation
+        if type is _EMPTY and param.default is not _EMPTY and param.default is not None:
+            type = param.default.__class__
+        return cls(param.name, type, param.default)
+
+
+class ActionSchema:
+    """
+    Metadata of an Action class: its name, abbreviation, docs and the parameters it's created with.
+
+    Every Action subclass registers a schema when it's defined. The values are computed the first time
+    they're used and then kept, so an action class is only inspected once.
+    The values used by the command line interface can be cached on disk between runs, see `save_schemas`.
+    """
+
+    def __init__(self, action: Type["Action"]) -> None:
+        self.action = action
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(name={self.name}, type={self.type}, abbrev={self.abbrev})"
+
+    @property
+    def type(self) -> str | None:
+        return self.action.type
+
+    @property
+    def abbrev(self) -> str | None:
+        return self.action.abbrev
+
+    @property
+    def priority(self) -> int:
+        return self.action.priority
+
+    @cached_property
+    def name(self) -> str:
+        return self.action.name
+
+    @cached_property
+    def doc(self) -> str:
+        return self.action.get_docstring()
+
+    @cached_property
+    def description(self) -> str:
+        return _short_description(self.doc)
+
+    @cached_property
+    def params(self) -> list[ActionParam]:
+        """
+        Parameters of the action's `__init__` method, without 'self' and variadic parameters.
+        """
+        return _params(self.action.__init__)[1:]
+
+    @cached_property
+    def accepts_kwargs(self) -> bool:
+        """
+        Whether the action's `__init__` method takes `**kwargs`, i.e. any keyword argument.
+        """
+        params = _signature(self.action.__init__).parameters.values()
+        return any(i.kind == inspect.Parameter.VAR_KEYWORD for i in params)
+
+    @cached_property
+    def parsable(self) -> bool:
+        return self.action.is_parsable()
+
+    @cached_property
+    def parse_params(self) -> list[ActionParam]:
+        """
+        Parameters of the action's `parse` method.
+        """
+        return _params(self.action.parse)
+
+    def get_param(self, name: str, parse: bool = False) -> ActionParam | None:
+        for i in self.parse_params if parse else self.params:
+            if i.name == name:
+                return i
+        return None
+
+    def dict(self) -> dict[str, Any]:
+        """
+        Returns the values of the schema that can be cached on disk.
+        """
+        return {
+            "name": self.name,
+            "type": self.type,
+            "abbrev": self.abbrev,
+            "priority": self.priority,
+            "description": self.description,
+            "doc": self.doc,
+        }
+
+    def update(self, data: Dict[str, Any]) -> None:
+        """
+        Set the values returned by `dict`, e.g. from a cache file.
+        """
+        self.action.abbrev = data["abbrev"]
+        self.name = data["name"]
+        self.doc = data["doc"]
+        self.description = data["description"]
+
+
+_schemas: dict[type, ActionSchema] = {}
+
+
+def register(action: Type["Action"]) -> ActionSchema:
+    """
+    Create the schema of an action class. Called when an Action subclass is defined.
+    """
+    schema = _schemas[action] = ActionSchema(action)
+    return schema
+
+
+def get_schema(action: Type["Action"]) -> ActionSchema:
+    """
+    Returns the schema of an action class.
+    """
+    schema = _schemas.get(action)
+    if schema is None:
+        schema = register(action)
+    return schema
+
+
+def load_schemas(actions: list[Type["Action"]], path: str | None = None) -> list[ActionSchema] | None:
+    """
+    Load the schemas of 'actions' from a cache file written by `save_schemas`.
+    Returns None if the file doesn't exist, or pypipeline or any of the modules that define the actions changed
+    since it was written.
+    """
+    if path is None:
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("key") != _cache_key(actions):
+        return None
+    schemas = []
+    for action, values in zip(actions, data["schemas"]):
+        schema = get_schema(action)
+        schema.update(values)
+        schemas.append(schema)
+    return schemas
+
+
+def save_schemas(actions: list[Type["Action"]], path: str) -> None:
+    """
+    Write the schemas of 'actions' to a cache file, keyed by the modification times of the modules that define them
+    and of pypipeline itself.
+    Errors are ignored, the cache is only an optimization.
+    """
+    data = {"key": _cache_key(actions), "schemas": [get_schema(i).dict() for i in actions]}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _signature(fn: Callable) -> inspect.Signature:
+    try:
+        return inspect.signature(fn, eval_str=True)
+    except (NameError, TypeError):
+        return inspect.signature(fn)
+
+
+def _params(fn: Callable) -> list[ActionParam]:
+    return [
+        ActionParam.from_parameter(i) for i in _signature(fn).parameters.values() if i.kind not in _VARIADIC
+    ]
+
+
+def _cache_key(actions: list[Type["Action"]]) -> list:
+    modules = {}
+    for i in actions:
+        if i.__module__ not in modules:
+            modules[i.__module__] = _module_mtime(i.__module__)
+    return [
+        SCHEMA_CACHE_VERSION,
+        list(RESERVED_FLAGS),
+        _package_mtime(),
+        [[i.__module__, i.__qualname__] for i in actions],
+        [[name, mtime] for name, mtime in sorted(modules.items())],
+    ]
+
+
+def _package_mtime() -> int:
+    """
+    Latest modification time of pypipeline's own modules, so that upgrading it invalidates the cache.
+    """
+    latest = 0
+    with os.scandir(os.path.dirname(os.path.abspath(__file__))) as entries:
+        for i in entries:
+            if i.name.endswith(".py"):
+                latest = max(latest, i.stat().st_mtime_ns)
+    return latest
+
+
+def _module_mtime(name: str) -> int | None:
+    path = getattr(sys.modules.get(name), "__file__", None)
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _short_description(doc: str) -> str:
+    if not doc:
+        return ""
+    import docstring_parser
+
+    parsed = docstring_parser.parse(doc)
+    return parsed.short_description or parsed.long_description or ""
+
+
+__all__ = ["ActionParam", "ActionSchema", "get_schema", "load_schemas", "save_schemas"]
@@ -0,0 +1,119 @@
+import weakref
+from typing import TYPE_CHECKING, Any
+
+from pypipeline.item import ItemBatch
+from pypipeline.lazy import numpy
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+SegmentHandle = tuple[str, Any, tuple[int, ...]]  # segment name, dtype, shape
+
+
+class SharedBatches:
+    """
+    Shared memory segments holding the numeric columns and discard masks of ItemBatches,
+    so process workers can read and update a batch without it being pickled.
+    Only numpy arrays with a non-object dtype are shared, other columns are sent to workers as usual.
+    Segments can be attached by workers until the batch is released.
+    Each segment is kept open by the array that views it and is closed once that array is freed.
+    """
+
+    def __init__(self) -> None:
+        self._batches: dict[int, tuple[ItemBatch, dict[str | None, SegmentHandle], list["SharedMemory"]]] = {}
+
+    def __len__(self):
+        return len(self._batches)
+
+    def __contains__(self, batch: ItemBatch) -> bool:
+        return id(batch) in self._batches
+
+    def share(self, batch: ItemBatch) -> ItemBatch:
+        """
+        Copy the shareable columns and the discard mask of 'batch' into shared memory.
+
+        Returns:
+            ItemBatch: A batch backed by shared memory. 'batch' itself if it's already shared.
+        """
+        if batch in self:
+            return batch
+        handles: dict[str | None, SegmentHandle] = {}
+        segments = []
+        columns = {}
+        for name, column in batch.columns.items():
+            if _shareable(column):
+                columns[name], handles[name], shm = _copy_to_shared(column)
+                segments.append(shm)
+            else:
+                columns[name] = column
+        discarded = batch.discarded
+        if _shareable(discarded):
+            discarded, handles[None], shm = _copy_to_shared(discarded)
+            segments.append(shm)
+        shared = ItemBatch(columns, discarded)
+        self._batches[id(shared)] = (shared, handles, segments)
+        return shared
+
+    def handles(self, batch: ItemBatch) -> dict[str | None, SegmentHandle]:
+        """
+        Returns the segments of a shared batch, by column name. The discard mask is under None.
+        """
+        return self._batches[id(batch)][1]
+
+    def release(self, batch: ItemBatch) -> None:
+        """
+        Free the shared memory segments of a batch. Its columns stay usable in this process.
+        """
+        entry = self._batches.pop(id(batch), None)
+        if entry is None:
+            return
+        for shm in entry[2]:
+            shm.unlink()
+
+    def release_all(self) -> None:
+        for batch, _, _ in list(self._batches.values()):
+            self.release(batch)
+
+
+def attach(handles: dict[str | None, SegmentHandle]) -> dict[str | None, Any]:
+    """
+    Open the segments of a shared batch in a worker.
+    A segment is closed once its array and all views of it are freed.
+
+    Returns:
+        dict: Arrays by column name. The discard mask is under None.
+    """
+    from multiprocessing.shared_memory import SharedMemory
+
+    return {
+        name: _array(SharedMemory(name=segment), shape, dtype)
+        for name, (segment, dtype, shape) in handles.items()
+    }
+
+
+def _shareable(column: Any) -> bool:
+    np = numpy()
+    return np is not None and isinstance(column, np.ndarray) and not column.dtype.hasobject
+
+
+def _copy_to_shared(array: Any) -> tuple[Any, SegmentHandle, "SharedMemory"]:
+    from multiprocessing.shared_memory import SharedMemory
+
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = _array(shm, array.shape, array.dtype)
+    shared[...] = array
+    return shared, (shm.name, array.dtype, array.shape), shm
+
+
+def _array(shm: "SharedMemory", shape: tuple[int, ...], dtype: Any) -> Any:
+    """
+    Create an array backed by 'shm'. The segment is pinned to the array and closed when the array is freed.
+    Views of the array keep it alive through their base.
+    """
+    array = numpy().ndarray(shape, dtype=dtype, buffer=shm.buf)  # type: ignore
+    finalizer = weakref.finalize(array, shm.close)
+    finalizer.atexit = False
+    return array
+
+
+__all__ = ["SharedBatches", "attach"]
@@ -0,0 +1,160 @@
+import json
+import pickle
+import struct
+import sys
+from typing import IO, Any, Iterable, Iterator
+
+from pypipeline.constants import OUTPUT_BUFFER_SIZE
+from pypipeline.item import Item
+
+_FRAME_HEADER = struct.Struct("<I")
+_PICKLE_ERRORS = (pickle.PicklingError, TypeError, AttributeError)
+
+
+class Sink:
+    """
+    Base class for outputs that processed items are written to.
+    Writes are collected in a buffer that is written to the file once it grows over 'buffer_size'.
+    If the file is a terminal, every write is flushed immediately.
+
+    Args:
+        file (IO): File to write to.
+        buffer_size (int, optional): Size of the write buffer.
+        close_file (bool, optional): Close the file when the sink is closed.
+    """
+
+    def __init__(
+        self, file: IO, buffer_size: int = OUTPUT_BUFFER_SIZE, close_file: bool = False
+    ) -> None:
+        self.file = file
+        self.buffer_size = 0 if _isatty(file) else buffer_size
+        self.close_file = close_file
+        self._buffer: list = []
+        self._buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def encode(self, item: Item) -> Any:
+        raise NotImplementedError
+
+    def join(self, chunks: list) -> Any:
+        raise NotImplementedError
+
+    def write(self, item: Item) -> None:
+        data = self.encode(item)
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def write_many(self, items: Iterable[Item]) -> None:
+        for item in items:
+            self.write(item)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self.file.write(self.join(self._buffer))
+            self._buffer.clear()
+            self._buffered = 0
+        self.file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self.close_file:
+            self.file.close()
+
+
+class TextSink(Sink):
+    """
+    Writes `str(item)` for each item, one per line.
+    """
+
+    def encode(self, item: Item) -> str:
+        return f"{item}\n"
+
+    def join(self, chunks: list[str]) -> str:
+        return "".join(chunks)
+
+
+class JsonlSink(Sink):
+    """
+    Writes `item.dict()` for each item as a JSON object, one per line.
+    Values that aren't JSON serializable are converted to strings.
+    """
+
+    def encode(self, item: Item) -> str:
+        return json.dumps(item.dict(), default=str) + "\n"
+
+    def join(self, chunks: list[str]) -> str:
+        return "".join(chunks)
+
+
+class BinarySink(Sink):
+    """
+    Writes `item.dict()` for each item as a pickle, prefixed with its length as a 4-byte little-endian integer.
+    Values that can't be pickled are converted to strings. Use `read_binary` to read the items back,
+    and only from trusted files, since unpickling can run arbitrary code.
+    """
+
+    def encode(self, item: Item) -> bytes:
+        values = item.dict()
+        try:
+            data = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+        except _PICKLE_ERRORS:
+            data = pickle.dumps(
+                {k: _picklable(v) for k, v in values.items()}, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        return _FRAME_HEADER.pack(len(data)) + data
+
+    def join(self, chunks: list[bytes]) -> bytes:
+        return b"".join(chunks)
+
+
+SINKS: dict[str, type[Sink]] = {"text": TextSink, "jsonl": JsonlSink, "binary": BinarySink}
+
+
+def open_sink(format: str = "text", path: str | None = None) -> Sink:
+    """
+    Open a sink for one of the formats in `SINKS`. Writes to stdout if 'path' is None.
+    """
+    if format not in SINKS:
+        raise ValueError(f"output format must be one of: {', '.join(SINKS)}")
+    binary = format == "binary"
+    if path is None:
+        return SINKS[format](sys.stdout.buffer if binary else sys.stdout)
+    file = open(path, "wb") if binary else open(path, "w", encoding="utf-8", errors="surrogateescape")
+    return SINKS[format](file, close_file=True)
+
+
+def read_binary(file: IO[bytes]) -> Iterator[dict[str, Any]]:
+    """
+    Read items written by a BinarySink.
+
+    Warning:
+        Items are unpickled, which can run arbitrary code. Only read files from trusted sources.
+    """
+    while header := file.read(_FRAME_HEADER.size):
+        (size,) = _FRAME_HEADER.unpack(header)
+        yield pickle.loads(file.read(size))
+
+
+def _picklable(value: Any) -> Any:
+    try:
+        pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except _PICKLE_ERRORS:
+        return str(value)
+    return value
+
+
+def _isatty(file: IO) -> bool:
+    try:
+        return file.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+__all__ = ["Sink", "TextSink", "JsonlSink", "BinarySink", "open_sink", "read_binary"]
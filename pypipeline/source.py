@@ -0,0 +1,50 @@
+import mmap
+import os
+
+from pypipeline.constants import MMAP_RANGE_SIZE
+
+
+def line_ranges(path: str, size: int = MMAP_RANGE_SIZE) -> list[tuple[int, int]]:
+    """
+    Split a file into byte ranges of about 'size' bytes. Each range ends at a line boundary.
+
+    Args:
+        path (str): Path to the file.
+        size (int, optional): Approximate size of a range in bytes.
+
+    Returns:
+        list[tuple[int, int]]: A list of (start, end) byte offsets.
+
+    """
+    if size < 1:
+        raise ValueError(f"range size must be at least 1, got {size}")
+    if os.path.getsize(path) == 0:
+        return []
+    ranges = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        total, start = len(mm), 0
+        while start < total:
+            end = start + size
+            if end >= total:
+                end = total
+            else:
+                newline = mm.find(b"\n", end - 1)
+                end = total if newline < 0 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_range(path: str, start: int, end: int) -> list[str]:
+    """
+    Read the lines in a byte range of a file through a memory map.
+    Lines are split on newlines only and trailing carriage returns are stripped,
+    same as `util.read_lines` on a file opened with `newline="\\n"`. Empty lines are skipped.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    lines = (i.rstrip(b"\r") for i in data.split(b"\n"))
+    return [i.decode("utf-8", errors="surrogateescape") for i in lines if i]
+
+
+__all__ = ["line_ranges", "read_range"]
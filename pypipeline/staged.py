@@ -0,0 +1,294 @@
+import queue
+import threading
+import time
+from typing import Any, Iterable, Iterator, Literal
+
+from pypipeline.action import Action
+from pypipeline.constants import MULTI_CHUNKSIZE, STAGE_POLL_INTERVAL, STAGE_QUEUE_SIZE
+from pypipeline.item import Item
+from pypipeline.pipeline import Pipeline, _call_worker, _progress_bar, _take
+from pypipeline.stats import StageStats
+from pypipeline.util import chunked
+
+_DONE = object()
+
+
+class Stage:
+    """
+    A group of consecutive actions that a StagedPipeline runs on its own pool of workers.
+
+    Args:
+        actions (list[Action]): Actions of the stage.
+        workers (int, optional): Number of workers of the stage.
+        executor (str, optional): Run the workers as "threads" or "processes".
+        queue_size (int, optional): Maximum number of chunks waiting for the stage.
+    """
+
+    def __init__(
+        self,
+        actions: list[Action],
+        workers: int = 1,
+        executor: Literal["threads", "processes"] = "threads",
+        queue_size: int = STAGE_QUEUE_SIZE,
+    ) -> None:
+        if executor not in ("threads", "processes"):
+            raise ValueError("executor must be one of: threads, processes")
+        if workers < 1:
+            raise ValueError("a stage needs at least one worker")
+        self.actions = actions
+        self.workers = workers
+        self.executor = executor
+        self.queue_size = queue_size
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(actions={self.actions}, workers={self.workers}, "
+            f"executor={self.executor}, queue_size={self.queue_size})"
+        )
+
+    @property
+    def name(self) -> str:
+        return ", ".join(i.name for i in self.actions)
+
+
+class StagedPipeline(Pipeline):
+    """
+    A subclass of Pipeline that runs each stage on its own pool of workers, so a slow stage can be given more workers.
+
+    Chunks of items flow from stage to stage through bounded queues. When a stage falls behind,
+    its queue fills up and the stages before it block until it catches up. Chunks waiting to be
+    yielded in order count against the same limit, so at most `queue_size + workers` chunks per stage
+    are in flight at once and a slow chunk stalls new input instead of growing the reorder buffer.
+    Only items that are still kept are sent to a stage. Per-stage throughput and queue depth are available
+    in `stage_stats` after a run. With 'profile', the stats of all stages are collected in `stats`.
+
+    Args:
+        stages (list[Stage]): Stages of the pipeline, in order.
+    """
+
+    def __init__(self, stages: list[Stage], **kwargs) -> None:
+        super().__init__([a for stage in stages for a in stage.actions], **kwargs)
+        self.stages = stages
+        self.stage_stats: list[StageStats] = []
+        self._stage_pipelines = [self._create_stage_pipeline(i) for i in stages]
+
+    def _create_stage_pipeline(self, stage: Stage) -> Pipeline:
+        pipeline = Pipeline(
+            stage.actions,
+            on_discrad=self.on_discard,
+            executor=stage.executor,
+            profile=self.stats is not None,
+            cache=self.cache,
+        )
+        if self.stats is not None:
+            pipeline.stats = self.stats  # threads record directly, process workers send theirs back
+        return pipeline
+
+    def add_action(self, action: Action):
+        """
+        Add an action to the last stage.
+        """
+        self._stage_pipelines[-1].add_action(action)
+        self.stages[-1].actions.append(action)
+        super().add_action(action)
+
+    def merge_pattern_filters(self):
+        """
+        Merge pattern filters within each stage. Filters are never merged across stages.
+        """
+        for stage, pipeline in zip(self.stages, self._stage_pipelines):
+            pipeline.merge_pattern_filters()
+            stage.actions = list(pipeline.actions)
+        self.actions = [a for stage in self.stages for a in stage.actions]
+        self._close_pool()
+        self._recompile()
+
+    def compile(self):
+        for i in self._stage_pipelines:
+            i.compile()
+        return super().compile()
+
+    def close(self):
+        for i in self._stage_pipelines:
+            i.close()
+        super().close()
+
+    def process_multi_iter(
+        self,
+        items: Iterable[Item],
+        t: int = 0,
+        chunksize: int = MULTI_CHUNKSIZE,
+        mode: Literal["kept", "discarded"] | None = None,
+        limit: int | None = None,
+        ordered: bool = True,
+    ) -> Iterator[Item]:
+        """
+        Same as `process_staged`. 't' is ignored, each stage has its own number of workers.
+        """
+        yield from self.process_staged(items, chunksize, mode, limit, ordered)
+
+    def process_staged(
+        self,
+        items: Iterable[Item],
+        chunksize: int = MULTI_CHUNKSIZE,
+        mode: Literal["kept", "discarded"] | None = None,
+        limit: int | None = None,
+        ordered: bool = True,
+    ) -> Iterator[Item]:
+        """
+        Process items through the stages, yielding them in input order as they leave the last stage.
+        Once 'limit' items were found, all stages are stopped.
+
+        Args:
+            items (Iterable[Item]): Items to be processed.
+            chunksize (int, optional): The number of items passed between stages at once.
+            mode (str, optional): Only yield "kept" or "discarded" items. If None, all items are yielded.
+            limit (int, optional): Stop after this many items matching 'mode' (kept items if 'mode' is None).
+            ordered (bool, optional): Yield items in input order. If False, chunks are yielded as they leave the last stage.
+
+        Yields:
+            Item: Processed items.
+        """
+        if limit is not None:
+            yield from _take(self.process_staged(items, chunksize, mode, ordered=ordered), limit, mode)
+            return
+        max_in_flight = sum(i.queue_size + i.workers for i in self.stages)
+        queues = [queue.Queue(maxsize=i.queue_size) for i in self.stages]
+        queues.append(queue.Queue(maxsize=self.stages[-1].queue_size))
+        window = threading.Semaphore(max_in_flight)  # released when a chunk is yielded
+        stop = threading.Event()
+        errors: list[BaseException] = []
+        self.stage_stats = [StageStats(i.name, i.workers) for i in self.stages]
+        alive = [i.workers for i in self.stages]
+        locks = [threading.Lock() for _ in self.stages]
+        pools = [
+            pipeline.start(stage.workers) if stage.executor == "processes" else None
+            for stage, pipeline in zip(self.stages, self._stage_pipelines)
+        ]
+
+        def feed():
+            try:
+                for task in enumerate(chunked(items, chunksize)):
+                    if not _acquire(window, stop) or not _put(queues[0], task, stop):
+                        return
+                for _ in range(self.stages[0].workers):
+                    _put(queues[0], _DONE, stop)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        def work(index: int):
+            inbox, outbox = queues[index], queues[index + 1]
+            pipeline, pool = self._stage_pipelines[index], pools[index]
+            stats, lock = self.stage_stats[index], locks[index]
+            try:
+                while (task := _get(inbox, stop)) is not None:
+                    if task is _DONE:
+                        break
+                    start = time.perf_counter()
+                    seq, chunk = task
+                    was_discarded = [i.discarded for i in chunk]
+                    live = [i for i, discarded in zip(chunk, was_discarded) if not discarded]
+                    if live:
+                        if pool is not None:
+                            *_, results, state, cache_counts = pool.apply(
+                                _call_worker, ("_process_chunk", live)
+                            )
+                            if state is not None:
+                                pipeline._merge_worker_state(state)
+                            if cache_counts is not None:
+                                self.cache.add_counts(*cache_counts)  # type: ignore
+                            processed = iter(results)
+                        else:
+                            processed = iter(pipeline.process_item_batch(live))
+                        chunk = [
+                            i if discarded else next(processed)
+                            for i, discarded in zip(chunk, was_discarded)
+                        ]
+                    with lock:
+                        stats.sample_queue(inbox.qsize())
+                        stats.add_chunk(len(live), time.perf_counter() - start)
+                    if not _put(outbox, (seq, chunk), stop):
+                        return
+                with lock:
+                    alive[index] -= 1
+                    last = alive[index] == 0
+                if last:
+                    next_workers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+                    for _ in range(next_workers):
+                        _put(outbox, _DONE, stop)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads += [
+                threading.Thread(target=work, args=(index,), daemon=True) for _ in range(stage.workers)
+            ]
+        bar = _progress_bar("[staged]") if self.verbose else None
+        reorder_buffer: dict[int, list[Item]] = {}
+        next_seq = 0
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        try:
+            while (task := _get(queues[-1], stop)) is not None and task is not _DONE:
+                seq, chunk = task
+                reorder_buffer[seq if ordered else next_seq] = chunk
+                if bar is not None:
+                    bar.update(len(chunk))
+                while next_seq in reorder_buffer:
+                    chunk = reorder_buffer.pop(next_seq)
+                    next_seq += 1
+                    window.release()
+                    if mode is not None:
+                        discarded = mode == "discarded"
+                        chunk = [i for i in chunk if i.discarded == discarded]
+                    yield from chunk
+            if errors:
+                raise errors[0]
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            if bar is not None:
+                bar.close()
+            wall = time.perf_counter() - start
+            for stats in self.stage_stats:
+                stats.wall = wall
+
+    def print_stage_stats(self):
+        print("Stage stats:")
+        for i in self.stage_stats:
+            print(f"\t{i}")
+
+
+def _put(q: queue.Queue, task: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(task, timeout=STAGE_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _acquire(semaphore: threading.Semaphore, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        if semaphore.acquire(timeout=STAGE_POLL_INTERVAL):
+            return True
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> Any:
+    while not stop.is_set():
+        try:
+            return q.get(timeout=STAGE_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+    return None
+
+
+__all__ = ["Stage", "StagedPipeline"]
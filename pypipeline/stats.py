@@ -0,0 +1,280 @@
+import math
+import threading
+from typing import Any
+
+from pypipeline.constants import LATENCY_BUCKETS_PER_OCTAVE
+
+
+class WorkerStats:
+    """
+    Time a single worker spent processing chunks (busy) and waiting for work (idle) during a run.
+    """
+
+    def __init__(self, worker: int) -> None:
+        self.worker = worker
+        self.chunks = 0
+        self.items = 0
+        self.busy = 0.0
+        self.idle = 0.0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(worker={self.worker}, chunks={self.chunks}, items={self.items}, "
+            f"busy={self.busy:.3f}s, idle={self.idle:.3f}s)"
+        )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def add_chunk(self, items: int, busy: float) -> None:
+        with self._lock:
+            self.chunks += 1
+            self.items += items
+            self.busy += busy
+
+    @property
+    def utilization(self) -> float:
+        total = self.busy + self.idle
+        if total == 0:
+            return 0.0
+        return self.busy / total
+
+
+class StageStats:
+    """
+    Throughput of a single stage of a StagedPipeline and the depth of the queue feeding it during a run.
+    """
+
+    def __init__(self, name: str, workers: int) -> None:
+        self.name = name
+        self.workers = workers
+        self.chunks = 0
+        self.items = 0
+        self.busy = 0.0
+        self.wall = 0.0
+        self.max_queue_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(name={self.name}, workers={self.workers}, items={self.items}, "
+            f"throughput={self.throughput:.1f}/s, utilization={self.utilization:.1%}, "
+            f"queue_depth={self.queue_depth:.1f}, max_queue_depth={self.max_queue_depth})"
+        )
+
+    def add_chunk(self, items: int, busy: float) -> None:
+        self.chunks += 1
+        self.items += items
+        self.busy += busy
+
+    def sample_queue(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._depth_total += depth
+        self._depth_samples += 1
+
+    @property
+    def queue_depth(self) -> float:
+        """
+        Mean number of chunks waiting in the stage's queue when a worker took one.
+        """
+        if self._depth_samples == 0:
+            return 0.0
+        return self._depth_total / self._depth_samples
+
+    @property
+    def throughput(self) -> float:
+        """
+        Items processed by the stage per second of the run.
+        """
+        if self.wall == 0:
+            return 0.0
+        return self.items / self.wall
+
+    @property
+    def utilization(self) -> float:
+        total = self.wall * self.workers
+        if total == 0:
+            return 0.0
+        return min(self.busy / total, 1.0)
+
+
+class ActionStats:
+    """
+    Counters and a latency histogram for a single action.
+    Latencies are bucketed on a log scale, so percentiles are accurate to about 20%.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.total = 0.0
+        self.passed = 0
+        self.discarded = 0
+        self.errors = 0
+        self.histogram: dict[int, int] = {}
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(name={self.name}, calls={self.calls}, total={self.total:.3f}s, "
+            f"passed={self.passed}, discarded={self.discarded}, errors={self.errors})"
+        )
+
+    def record(self, duration: float, calls: int = 1, passed: int = 1) -> None:
+        """
+        Record 'calls' items evaluated in 'duration' seconds, 'passed' of which were not discarded.
+        """
+        self.calls += calls
+        self.total += duration
+        self.passed += passed
+        self.discarded += calls - passed
+        bucket = _latency_bucket(duration / calls)
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + calls
+
+    def merge(self, other: "ActionStats") -> None:
+        self.calls += other.calls
+        self.total += other.total
+        self.passed += other.passed
+        self.discarded += other.discarded
+        self.errors += other.errors
+        for bucket, count in other.histogram.items():
+            self.histogram[bucket] = self.histogram.get(bucket, 0) + count
+
+    @property
+    def mean(self) -> float:
+        if self.calls == 0:
+            return 0.0
+        return self.total / self.calls
+
+    def percentile(self, p: float) -> float:
+        """
+        Returns the approximate latency (in seconds) below which 'p' percent of calls fall.
+        """
+        if not self.histogram:
+            return 0.0
+        target = self.calls * p / 100
+        seen = 0
+        for bucket in sorted(self.histogram):
+            seen += self.histogram[bucket]
+            if seen >= target:
+                return _bucket_upper_bound(bucket)
+        return _bucket_upper_bound(max(self.histogram))
+
+    def dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "total": self.total,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "passed": self.passed,
+            "discarded": self.discarded,
+            "errors": self.errors,
+        }
+
+
+class PipelineStats:
+    """
+    Per-action stats of a pipeline. Stats from different workers can be combined with `merge`.
+    Actions are listed by their repr, with a '!' appended for inverted filters.
+    Stats can be recorded from several threads at once.
+    """
+
+    def __init__(self) -> None:
+        self.actions: dict[str, ActionStats] = {}
+        self._by_id: dict[int, ActionStats] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"actions": self.actions}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.actions = state["actions"]
+
+    def get(self, action: Any) -> ActionStats:
+        stats = self._by_id.get(id(action))
+        if stats is None:
+            name = _stats_name(action)
+            stats = self.actions.setdefault(name, ActionStats(name))
+            self._by_id[id(action)] = stats
+        return stats
+
+    def record(self, action: Any, duration: float, calls: int = 1, passed: int = 1) -> None:
+        with self._lock:
+            self.get(action).record(duration, calls, passed)
+
+    def record_error(self, action: Any) -> None:
+        with self._lock:
+            self.get(action).errors += 1
+
+    def merge(self, other: "PipelineStats") -> None:
+        with self._lock:
+            for name, stats in other.actions.items():
+                self.actions.setdefault(name, ActionStats(name)).merge(stats)
+
+    def dict(self) -> dict[str, Any]:
+        return {"actions": [i.dict() for i in self.actions.values()]}
+
+    def table(self) -> str:
+        header = ["action", "calls", "total", "mean", "p50", "p90", "p99", "passed", "discarded", "errors"]
+        rows = [header]
+        for i in self.actions.values():
+            rows.append(
+                [
+                    i.name,
+                    str(i.calls),
+                    f"{i.total:.3f}s",
+                    _format_latency(i.mean),
+                    _format_latency(i.percentile(50)),
+                    _format_latency(i.percentile(90)),
+                    _format_latency(i.percentile(99)),
+                    str(i.passed),
+                    str(i.discarded),
+                    str(i.errors),
+                ]
+            )
+        widths = [max(len(row[col]) for row in rows) for col in range(len(header))]
+        lines = []
+        for row in rows:
+            cells = [row[0].ljust(widths[0])] + [c.rjust(w) for c, w in zip(row[1:], widths[1:])]
+            lines.append("  ".join(cells))
+        return "\n".join(lines)
+
+
+def _stats_name(action: Any) -> str:
+    name = repr(action)
+    if getattr(action, "invert", False):
+        name += "!"
+    return name
+
+
+def _latency_bucket(seconds: float) -> int:
+    ns = seconds * 1e9
+    if ns <= 1:
+        return 0
+    return int(math.log2(ns) * LATENCY_BUCKETS_PER_OCTAVE) + 1
+
+
+def _bucket_upper_bound(bucket: int) -> float:
+    return 2 ** (bucket / LATENCY_BUCKETS_PER_OCTAVE) / 1e9
+
+
+def _format_latency(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.2f}us"
+
+
+__all__ = ["WorkerStats", "StageStats", "ActionStats", "PipelineStats"]
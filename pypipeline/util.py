@@ -1,12 +1,21 @@
+import os
 import re
 import sys
-from typing import Literal
-
-from stdl import fs
-from stdl.st import snake_case
+from fnmatch import fnmatch, translate
+from functools import partial
+from itertools import islice
+from operator import methodcaller
+from typing import IO, Callable, Iterable, Iterator, Literal, TypeVar
 
 from pypipeline.action import Action
 
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse  # type: ignore
+
+T = TypeVar("T")
+
 
 def get_pattern_type(pattern: str) -> Literal["glob", "regex", None]:
     """Returns whether the pattern is a glob or regex pattern."""
@@ -78,6 +87,8 @@ def fill_missing_abbreviations(actions: list[Action], taken: list[str]) -> None:
     """
     Fills in missing abbreviations for a list of actions.
     """
+    from stdl.st import snake_case
+
     for i in actions:
         if i.abbrev is None:
             i.abbrev = get_abbreviation(snake_case(i.__class__.__name__), taken=taken)
@@ -86,4 +97,122 @@ def fill_missing_abbreviations(actions: list[Action], taken: list[str]) -> None:
 def get_executable_name(*, full=False) -> str:
     if full:
         return sys.argv[0]
-    return sys.argv[0].split(fs.SEP)[-1]
+    return sys.argv[0].split(os.sep)[-1]
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """
+    Lazily split an iterable into lists of at most 'size' elements.
+    """
+    if size < 1:
+        raise ValueError(f"chunk size must be at least 1, got {size}")
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def read_lines(file: IO[str], batch_size: int) -> Iterator[list[str]]:
+    """
+    Lazily read lines from a file in batches of at most 'batch_size' lines.
+    Trailing newlines are stripped and empty lines are skipped.
+    """
+    for batch in chunked(file, batch_size):
+        lines = [i.rstrip("\r\n") for i in batch]
+        yield [i for i in lines if i]
+
+
+def glob_matcher(pattern: str) -> Callable[[str], bool]:
+    """
+    Returns a function that checks if a text matches a glob pattern, same as `fnmatch.fnmatch`.
+    Patterns that only use '*' wildcards are matched with string methods, others with a precompiled regex
+    that only runs if the literal prefix and suffix of the pattern match.
+    """
+    if os.path.normcase("A/") != "A/":  # fnmatch normalizes case and separators on this OS
+        return partial(fnmatch, pat=pattern)
+    if "?" in pattern or "[" in pattern:
+        first = min(i for i in (pattern.find(c) for c in "*?[") if i >= 0)
+        last = max(pattern.rfind(c) for c in "*?]")
+        prefix = pattern[:first]
+        suffix = pattern[last + 1 :] if last >= first else ""
+        match = re.compile(translate(pattern)).match
+        if not prefix and not suffix:
+            return match
+        return partial(_prefiltered, partial(_has_prefix_suffix, prefix, suffix), match)
+    parts = pattern.split("*")
+    if len(parts) == 1:
+        return pattern.__eq__
+    if all(i == "" for i in parts):
+        return methodcaller("__contains__", "")
+    if len(parts) == 2 and parts[0] == "":
+        return methodcaller("endswith", parts[1])
+    if len(parts) == 2 and parts[1] == "":
+        return methodcaller("startswith", parts[0])
+    if len(parts) == 3 and parts[0] == parts[2] == "":
+        return methodcaller("__contains__", parts[1])
+    return partial(_match_star_glob, tuple(parts))
+
+
+def regex_matcher(pattern: re.Pattern) -> Callable[[str], object]:
+    """
+    Returns a function that checks if a regex pattern matches anywhere in a text, same as `pattern.search`.
+    Patterns that are plain literals are matched with string methods. For other patterns, the longest
+    literal substring every match must contain is checked with `in` before running the regex.
+    """
+    if not isinstance(pattern.pattern, str) or pattern.flags & (re.IGNORECASE | re.LOCALE):
+        return pattern.search
+    try:
+        parsed = list(sre_parse.parse(pattern.pattern, pattern.flags))
+    except Exception:
+        return pattern.search
+
+    anchored = False
+    if parsed and parsed[0][0] == sre_parse.AT:
+        at = parsed[0][1]
+        if at == sre_parse.AT_BEGINNING_STRING or (
+            at == sre_parse.AT_BEGINNING and not pattern.flags & re.MULTILINE
+        ):
+            anchored = True
+            parsed = parsed[1:]
+
+    if parsed and all(op == sre_parse.LITERAL for op, _ in parsed):
+        literal = "".join(chr(v) for _, v in parsed)
+        if anchored:
+            return methodcaller("startswith", literal)
+        return methodcaller("__contains__", literal)
+
+    literal, longest = [], ""
+    for op, value in [*parsed, (None, None)]:
+        if op == sre_parse.LITERAL:
+            literal.append(chr(value))  # type: ignore
+            continue
+        if len(literal) > len(longest):
+            longest = "".join(literal)
+        literal = []
+    if len(longest) < 2:
+        return pattern.search
+    return partial(_prefiltered, methodcaller("__contains__", longest), pattern.search)
+
+
+def _prefiltered(check: Callable[[str], bool], match: Callable[[str], object], text: str) -> bool:
+    return check(text) and match(text) is not None
+
+
+def _has_prefix_suffix(prefix: str, suffix: str, text: str) -> bool:
+    return (
+        len(text) >= len(prefix) + len(suffix)
+        and text.startswith(prefix)
+        and text.endswith(suffix)
+    )
+
+
+def _match_star_glob(parts: tuple[str, ...], text: str) -> bool:
+    first, last = parts[0], parts[-1]
+    if not _has_prefix_suffix(first, last, text):
+        return False
+    pos, end = len(first), len(text) - len(last)
+    for part in parts[1:-1]:
+        pos = text.find(part, pos, end)
+        if pos < 0:
+            return False
+        pos += len(part)
+    return True
@@ -26,4 +26,5 @@ setup(
     ],
     packages=find_packages(),
     install_requires=REQUIREMENTS,
+    extras_require={"numpy": ["numpy"]},
 )
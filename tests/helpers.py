@@ -0,0 +1,61 @@
+from pypipeline.action import Filter, Modifier
+from pypipeline.item import Item
+
+
+class NumberItem(Item):
+    def __init__(self, value: int) -> None:
+        self.value = value
+        super().__init__()
+
+
+class KeyedItem(NumberItem):
+    __slots__ = ()
+
+    def cache_key(self):
+        return self.value
+
+
+class PathItem(Item):
+    def __init__(self, path: str) -> None:
+        self.path = path
+        super().__init__()
+
+    def __str__(self):
+        return self.path
+
+    def cache_key(self):
+        return self.path
+
+
+class EvenFilter(Filter):
+    def process(self, item: NumberItem) -> bool:
+        return item.value % 2 == 0
+
+
+class DoubleModifier(Modifier):
+    def process(self, item: NumberItem) -> NumberItem:
+        item.value *= 2
+        return item
+
+
+def make_numbers(n: int) -> list[NumberItem]:
+    return [NumberItem(i) for i in range(n)]
+
+
+def make_paths(n: int) -> list[PathItem]:
+    return [PathItem(f"file-{i}.{'py' if i % 2 else 'txt'}") for i in range(n)]
+
+
+class FakeClock:
+    """
+    Replaces the `time` module of the pipeline so that measured durations only depend on `advance`.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
@@ -1,4 +1,6 @@
-from pypipeline.action import parse_action
+import pytest
+
+from pypipeline.action import Filter, parse_action
 from pypipeline.filter import GlobFilter, TextPatternFilter
 
 
@@ -43,3 +45,30 @@ def test_parse_action():
         ).dict()
         == GlobFilter("*.py").dict()
     )
+
+
+def test_parse_action_unknown_arg():
+    actions = {"glob-filter": GlobFilter}
+    with pytest.raises(ValueError):
+        parse_action({"name": "glob-filter", "type": "filter", "args": {"glob": "*.py"}}, actions)
+
+
+class KwFilter(Filter):
+    def __init__(self, pattern: str, **options) -> None:
+        self.pattern = pattern
+        self.options = options
+        super().__init__()
+
+    def process(self, item) -> bool:
+        return True
+
+
+def test_parse_action_kwargs():
+    action = parse_action(
+        {"name": "kw-filter", "type": "filter", "args": {"pattern": "*.py", "flags": 2}},
+        {"kw-filter": KwFilter},
+    )
+    assert isinstance(action, KwFilter)
+    assert action.options == {"flags": 2}
+    assert KwFilter.get_schema().accepts_kwargs
+    assert not GlobFilter.get_schema().accepts_kwargs
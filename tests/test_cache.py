@@ -0,0 +1,146 @@
+import pickle
+
+from helpers import PathItem, make_paths
+
+from pypipeline.action import Filter, Modifier
+from pypipeline.cache import ActionCache, DiskCache
+from pypipeline.filter import TextPatternFilter
+from pypipeline.pipeline import Pipeline
+
+
+class PyFilter(Filter):
+    calls = 0
+
+    def process(self, item: PathItem) -> bool:
+        PyFilter.calls += 1
+        return item.path.endswith(".py")
+
+
+class UpperModifier(Modifier):
+    def process(self, item: PathItem) -> PathItem:
+        item.path = item.path.upper()
+        return item
+
+
+def run(cache: DiskCache, n: int) -> list[str]:
+    with Pipeline([PyFilter(), UpperModifier()], cache=cache) as pipeline:
+        return [i.path for i in pipeline.process_iter(make_paths(n), mode="kept")]
+
+
+def test_disk_cache_persists(tmp_path):
+    PyFilter.calls = 0
+    expected = run(DiskCache(str(tmp_path), batch_size=4), 20)
+    assert PyFilter.calls == 20
+
+    cache = DiskCache(str(tmp_path))
+    assert run(cache, 20) == expected
+    assert PyFilter.calls == 20
+    assert (cache.hits, cache.misses) == (30, 0)
+
+    cache = pickle.loads(pickle.dumps(cache))
+    assert run(cache, 22) == expected + ["FILE-21.PY"]
+    assert PyFilter.calls == 22
+
+
+def test_disk_cache_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path), maxsize=10, memory_size=1)
+    run(cache, 40)
+    cache.sync()
+    (size,) = cache.connection.execute("SELECT COUNT(*) FROM results").fetchone()
+    assert size == 10
+    cache.close()
+
+    cache = DiskCache(str(tmp_path), maxsize=10, memory_size=1)
+    run(cache, 45)
+    cache.sync()
+    (size,) = cache.connection.execute("SELECT COUNT(*) FROM results").fetchone()
+    assert size == cache._disk_size == 10
+    cache.clear()
+    (size,) = cache.connection.execute("SELECT COUNT(*) FROM results").fetchone()
+    assert size == 0 and len(cache) == 0
+    cache.close()
+
+
+def test_disk_cache_pickle_does_not_sync(tmp_path):
+    cache = DiskCache(str(tmp_path), batch_size=100)
+    for i in range(10):
+        cache.put(("action", i), i)
+    pickle.dumps(cache)
+    (size,) = cache.connection.execute("SELECT COUNT(*) FROM results").fetchone()
+    assert size == 0
+    cache.sync()
+    (size,) = cache.connection.execute("SELECT COUNT(*) FROM results").fetchone()
+    assert size == cache._disk_size == 10
+    cache.close()
+
+
+def test_disk_cache_multi(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    with Pipeline([PyFilter(), UpperModifier()], cache=cache) as pipeline:
+        first = [i.path for i in pipeline.process_multi(make_paths(30), t=2, chunksize=4).kept]
+    cache = DiskCache(str(tmp_path))
+    with Pipeline([PyFilter(), UpperModifier()], cache=cache) as pipeline:
+        second = [i.path for i in pipeline.process_multi(make_paths(30), t=2, chunksize=4).kept]
+    assert first == second
+    assert cache.misses == 0 and cache.hits == 45
+
+
+class PathPattern(TextPatternFilter):
+    def get_text(self, item: PathItem) -> str:
+        return item.path
+
+
+def test_action_id_includes_excluded_args():
+    cache = ActionCache()
+    glob, regex = PathPattern("a.c", t="glob"), PathPattern("a.c", t="regex")
+    assert cache.action_id(glob) != cache.action_id(regex)
+    assert cache.action_id(glob) == cache.action_id(PathPattern("a.c", t="glob"))
+    assert cache.action_id(glob) != cache.action_id(PathPattern("a.c", t="glob", invert=True))
+
+    items = [PathItem("abc")]
+    with Pipeline([glob], cache=cache, executor="serial") as pipeline:
+        assert len(list(pipeline.process_iter(items, mode="kept"))) == 0
+    with Pipeline([regex], cache=cache, executor="serial") as pipeline:
+        assert len(list(pipeline.process_iter([PathItem("abc")], mode="kept"))) == 1
+
+
+class SuffixFilter(Filter):
+    def __init__(self, suffix: str) -> None:
+        self.suffix = suffix
+        super().__init__()
+
+    def process(self, item: PathItem) -> bool:
+        return item.path.endswith(self.suffix)
+
+
+class HiddenArgFilter(Filter):
+    def __init__(self, suffix: str) -> None:
+        self._suffix = suffix
+        super().__init__()
+
+    def process(self, item: PathItem) -> bool:
+        return item.path.endswith(self._suffix)
+
+
+def test_action_id_inverted_after_construction(tmp_path):
+    inverted = SuffixFilter(".py")
+    inverted.invert = True  # the command line sets it after creating the filter
+    cache = ActionCache()
+    assert cache.action_id(SuffixFilter(".py")) != cache.action_id(inverted)
+
+    kept = run_filter(SuffixFilter(".py"), DiskCache(str(tmp_path)))
+    assert kept == [i.path for i in make_paths(10) if i.path.endswith(".py")]
+    assert run_filter(inverted, DiskCache(str(tmp_path))) == [i.path for i in make_paths(10) if i.path not in kept]
+
+
+def test_action_id_unknown_args():
+    cache = ActionCache()
+    assert cache.action_id(HiddenArgFilter(".py")) is None
+    assert run_filter(HiddenArgFilter(".py"), cache, 4) == ["file-1.py", "file-3.py"]
+    assert run_filter(HiddenArgFilter(".txt"), cache, 4) == ["file-0.txt", "file-2.txt"]
+    assert len(cache) == 0
+
+
+def run_filter(action: Filter, cache: ActionCache, n: int = 10) -> list[str]:
+    with Pipeline([action], cache=cache, executor="serial") as pipeline:
+        return [i.path for i in pipeline.process_iter(make_paths(n), mode="kept")]
@@ -0,0 +1,114 @@
+import json
+import sys
+
+import pytest
+from helpers import PathItem
+
+from pypipeline.action import Filter, Modifier
+from pypipeline.cli import PyPipelineCLI
+from pypipeline.constants import ExitCodes
+from pypipeline.sink import read_binary
+
+PATHS = [f"file-{i}.{'py' if i % 3 else 'txt'}" for i in range(30)]
+
+
+class SuffixFilter(Filter):
+    """Keep paths with a suffix."""
+
+    def __init__(self, suffix: str) -> None:
+        self.suffix = suffix
+        super().__init__()
+
+    def process(self, item: PathItem) -> bool:
+        return item.path.endswith(self.suffix)
+
+
+class UpperModifier(Modifier):
+    """Uppercase paths."""
+
+    def process(self, item: PathItem) -> PathItem:
+        item.path = item.path.upper()
+        return item
+
+
+class PrefixCLI(PyPipelineCLI):
+    def __init__(self, *args, **kwargs) -> None:
+        self.prefix = "dir/"
+        super().__init__(*args, **kwargs)
+
+    def collect_items(self, items: list[str]) -> list[PathItem]:
+        return [PathItem(self.prefix + i) for i in items]
+
+
+def run_cli(monkeypatch, *args: str) -> int:
+    monkeypatch.setattr(sys, "argv", ["tool", *args])
+    with pytest.raises(SystemExit) as e:
+        PrefixCLI([SuffixFilter, UpperModifier])  # type: ignore
+    return e.value.code  # type: ignore
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / "paths.txt"
+    path.write_text("\n".join(PATHS) + "\n")
+    return str(path)
+
+
+def expected(suffix: str, invert: bool = False) -> list[str]:
+    return [f"dir/{i}" for i in PATHS if i.endswith(suffix) != invert]
+
+
+def test_stdin(monkeypatch, capsys, input_file):
+    with open(input_file) as f:
+        monkeypatch.setattr(sys, "stdin", f)
+        assert run_cli(monkeypatch, "-t", "1", "--suffix-filter", ".txt") == ExitCodes.SUCCESS
+    assert capsys.readouterr().out.splitlines() == expected(".txt")
+
+
+@pytest.mark.parametrize("t", ["1", "2"])
+def test_input_file(monkeypatch, capsys, input_file, t):
+    assert run_cli(monkeypatch, "-t", t, "--input", input_file, "--suffix-filter", ".py") == ExitCodes.SUCCESS
+    assert capsys.readouterr().out.splitlines() == expected(".py")
+
+
+def test_limit_and_unordered(monkeypatch, capsys, input_file):
+    args = ["-t", "2", "--executor", "threads", "--input", input_file, "--limit", "3"]
+    assert run_cli(monkeypatch, *args, "--suffix-filter", ".py") == ExitCodes.SUCCESS
+    assert capsys.readouterr().out.splitlines() == expected(".py")[:3]
+
+    args = ["-t", "2", "--executor", "threads", "--input", input_file, "--unordered"]
+    assert run_cli(monkeypatch, *args, "--suffix-filter", ".py") == ExitCodes.SUCCESS
+    assert sorted(capsys.readouterr().out.splitlines()) == sorted(expected(".py"))
+
+
+@pytest.mark.parametrize("output_format", ["jsonl", "binary"])
+def test_output_format(monkeypatch, tmp_path, input_file, output_format):
+    output = str(tmp_path / "out")
+    args = ["-t", "1", "--input", input_file, "--output", output, "--output-format", output_format]
+    assert run_cli(monkeypatch, *args, "--upper-modifier", "--suffix-filter", ".PY") == ExitCodes.SUCCESS
+    if output_format == "jsonl":
+        with open(output) as f:
+            rows = [json.loads(line) for line in f]
+    else:
+        with open(output, "rb") as f:
+            rows = list(read_binary(f))
+    assert [i["path"] for i in rows] == [i.upper() for i in expected(".py")]
+
+
+def test_inverted_filter_with_cache(monkeypatch, capsys, tmp_path, input_file):
+    args = ["-t", "1", "--input", input_file, "--cache-dir", str(tmp_path / "cache")]
+    assert run_cli(monkeypatch, *args, "--suffix-filter", ".py") == ExitCodes.SUCCESS
+    assert capsys.readouterr().out.splitlines() == expected(".py")
+    assert run_cli(monkeypatch, *args, "--suffix-filter!", ".py") == ExitCodes.SUCCESS
+    assert capsys.readouterr().out.splitlines() == expected(".py", invert=True)
+
+
+def test_stats(monkeypatch, capsys, tmp_path, input_file):
+    stats_json = str(tmp_path / "stats.json")
+    args = ["-t", "1", "--input", input_file, "--stats", "--stats-json", stats_json]
+    assert run_cli(monkeypatch, *args, "--suffix-filter", ".py") == ExitCodes.SUCCESS
+    assert "suffix-filter" in capsys.readouterr().err
+    with open(stats_json) as f:
+        (action,) = json.load(f)["actions"]
+    assert action["calls"] == len(PATHS)
+    assert action["passed"] == len(expected(".py"))
@@ -8,8 +8,10 @@ from pypipeline.filter import (
     FloatFilter,
     GlobFilter,
     IntFilter,
+    MultiPatternFilter,
     RegexFilter,
     TextPatternFilter,
+    merge_pattern_filters,
 )
 
 
@@ -52,3 +54,99 @@ def test_text_pattern_filter():
     assert TextPatternFilter.parse(r"[\w]").invert == False
     assert TextPatternFilter.parse(r"[\w]").process("a") == True
     assert TextPatternFilter("py*").process("python") == True
+
+
+def test_int_filter_batch():
+    f = IntFilter(10, 20)
+    values = [5, 10, 15, 20, 25]
+    assert [bool(i) for i in f.process_batch(values)] == [False, True, True, True, False]
+    assert [f.process(i) for i in values] == [False, True, True, True, False]
+    assert FloatFilter(0.5, 1.5).process(1.0)
+    assert IntFilter.has_batch()
+
+
+def test_has_batch_fallback():
+    class ProcessOverride(IntFilter):
+        def process(self, item) -> bool:
+            return item.value > 0
+
+    class GetValueOverride(IntFilter):
+        def get_value(self, item):
+            return item.value
+
+    assert not ProcessOverride.has_batch()
+    assert GetValueOverride.has_batch()
+    assert not RegexFilter.has_batch()
+
+
+class NameText:
+    def get_text(self, item) -> str:
+        return item["name"]
+
+
+class NameGlob(NameText, GlobFilter):
+    pass
+
+
+class NameRegex(NameText, RegexFilter):
+    pass
+
+
+class ProcessOverrideGlob(GlobFilter):
+    def process(self, item) -> bool:
+        return super().process(item["name"])
+
+
+TEXTS = ["main.py", "test_main.py", "README.md", "setup.py", "src/app.js", "a\nb.py", ""]
+
+
+def evaluate(actions, text):
+    for action in actions:
+        if action.eval(Item(text)).discarded:
+            return False
+    return True
+
+
+class Item(dict):
+    def __init__(self, name: str) -> None:
+        super().__init__(name=name)
+        self.discarded = False
+
+
+@pytest.mark.parametrize("invert", [False, True])
+def test_merge_pattern_filters(invert):
+    filters = [
+        NameGlob("*.py", invert=invert),
+        NameRegex(r"^test_", invert=invert),
+        NameRegex(r"ma.n", invert=invert),
+        NameGlob("*.md", invert=invert),
+    ]
+    merged = merge_pattern_filters(filters)
+    assert len(merged) == 1
+    assert isinstance(merged[0], MultiPatternFilter)
+    for text in TEXTS:
+        assert evaluate(merged, text) == evaluate(filters, text), text
+
+
+def test_merge_pattern_filters_runs():
+    a, b = TextPatternFilter("*.py"), TextPatternFilter(r"\w+", invert=True)
+    c, d = TextPatternFilter(r"[ab]"), RegexFilter(re.compile("x", re.IGNORECASE))
+    custom = ProcessOverrideGlob("*.py")
+    merged = merge_pattern_filters([a, b, c, d, custom, NameGlob("*.py"), NameRegex("x")])
+    assert merged[:5] == [a, b, c, d, custom]
+    assert isinstance(merged[5], MultiPatternFilter)
+
+    backref = RegexFilter(r"(a)\1")
+    assert merge_pattern_filters([a, backref]) == [a, backref]
+    assert merge_pattern_filters([RegexFilter("(?P<x>a)"), RegexFilter("(?P<x>b)")])[0].pattern.pattern == "(?P<x>a)"
+
+
+def test_merge_pattern_filters_group_references():
+    for pattern in [r"(a)\1", r"(?P<x>a)(?P=x)", r"(a)?(?(1)b|c)", r"(?P<x>a)?(?(x)b|c)"]:
+        assert RegexFilter(pattern).to_regex() is None, pattern
+    assert RegexFilter(r"\\1(a)").to_regex() == r"\\1(a)"
+
+    x, conditional = NameRegex("(x)"), NameRegex("(a)?(?(1)b|c)")
+    merged = merge_pattern_filters([x, conditional])
+    assert merged == [x, conditional]
+    assert evaluate(merged, "xc") == evaluate([x, conditional], "xc")
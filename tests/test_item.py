@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+from helpers import PathItem
+
+from pypipeline.item import Item, ItemBatch
+
+
+def test_item_slots():
+    item = Item()
+    assert not hasattr(item, "__dict__")
+    assert item._extra is None
+    item.extra["a"] = 1
+    assert item.extra == {"a": 1}
+
+    item = pickle.loads(pickle.dumps(PathItem("a.py")))
+    assert item.path == "a.py"
+    assert item.discarded is False
+    assert item._extra is None
+
+
+def test_item_batch():
+    batch = ItemBatch({"value": [1, 2, 3, 4], "name": ["a", "b", "c", "d"]})
+    assert len(batch) == 4
+    batch.keep_where([True, False, True, True])
+    batch.keep_where([True, True, False, True], invert=True)
+    assert batch.count_kept() == 1
+    assert [row.name for row in batch.rows()] == ["c"]
+    assert [row.name for row in batch.rows(kept=False)] == ["a", "b", "d"]
+
+    row = next(batch.rows())
+    row.value = 30
+    row.discarded = True
+    assert batch["value"][2] == 30
+    assert batch.count_kept() == 0
+
+    with pytest.raises(ValueError):
+        ItemBatch({"a": [1], "b": [1, 2]})
+
+
+def test_item_dict():
+    item = PathItem("a.py")
+    assert item.dict() == {"discarded": False, "path": "a.py"}
+    item.extra["size"] = 3
+    assert item.dict()["extra"] == {"size": 3}
+
+    batch = ItemBatch({"value": [1, 2]})
+    batch.keep_where([False, True])
+    assert [row.dict() for row in batch] == [
+        {"value": 1, "discarded": True},
+        {"value": 2, "discarded": False},
+    ]
@@ -0,0 +1,153 @@
+import pickle
+import random
+
+import pytest
+
+from pypipeline.item import Item
+from pypipeline.items_container import ItemsContainer
+
+
+def make_items(n: int) -> list[Item]:
+    items = [Item() for _ in range(n)]
+    for i in items[::2]:
+        i.discarded = True
+    return items
+
+
+def test_counts_and_views():
+    items = make_items(10)
+    container = ItemsContainer(items)
+    assert len(container) == 10
+    assert container.count_discarded() == 5
+    assert container.count_kept() == 5
+    assert container.kept == items[1::2]
+    assert container.discarded == items[::2]
+    kept = container.kept
+    assert container.kept is kept
+    with pytest.raises(TypeError):
+        kept.clear()
+    copied = pickle.loads(pickle.dumps(kept))
+    assert type(copied) is list and len(copied) == 5
+
+    item = Item()
+    container.add(item)
+    assert container.kept[-1] is item
+    assert container.count_kept() == 6
+
+
+def test_remove():
+    items = make_items(6)
+    container = ItemsContainer(items)
+    container.remove(items[1])
+    container.remove(items[2])
+    handle = container.add(Item())
+    container.remove(handle)
+    assert list(container) == [items[0], *items[3:]]
+    assert container.count_kept() == 2
+    assert container.count_discarded() == 2
+    with pytest.raises(ValueError):
+        container.remove(items[1])
+    with pytest.raises(ValueError):
+        container.remove(handle)
+
+
+def test_invert_and_remove_discarded():
+    items = make_items(6)
+    container = ItemsContainer(items)
+    kept = container.kept
+    container.invert_discarded()
+    assert container.discarded == kept
+    assert container.kept == items[::2]
+    assert all(not i.discarded for i in items[::2])
+
+    container.remove_discarded()
+    assert container.items == items[::2]
+    assert container.count_discarded() == 0
+    assert len(container) == 3
+
+
+def test_sync():
+    items = make_items(4)
+    container = ItemsContainer(items)
+    items[1].discarded = True
+    container.sync()
+    assert container.count_discarded() == 3
+    assert container.kept == [items[3]]
+
+
+def test_handles_after_compaction():
+    items = make_items(6)
+    container = ItemsContainer(items)
+    container.remove(items[0])
+    assert container.items == items[1:]
+    handle = container.add(Item())
+    container.remove(4)
+    container.remove(items[5])
+    container.remove(handle)
+    assert container.items == items[1:4]
+    assert container.count_kept() == 2
+
+
+def test_modify_items():
+    items = make_items(4)
+    container = ItemsContainer(items)
+    item = Item()
+    container.items.append(item)
+    assert container.count_kept() == 3
+    assert container.kept[-1] is item
+    container.items.remove(item)
+    del container.items[0]
+    assert container.discarded == [items[2]]
+
+    container.items = make_items(2)
+    assert len(container) == 2
+    assert container.count_discarded() == 1
+
+
+def test_invert_twice():
+    items = make_items(4)
+    container = ItemsContainer(items)
+    container.invert_discarded()
+    container.invert_discarded()
+    assert container.kept == items[1::2]
+    assert [i.discarded for i in container] == [True, False, True, False]
+
+
+def test_invert_around_add():
+    container = ItemsContainer([Item()])
+    container.invert_discarded()
+    item = Item()
+    container.add(item)
+    container.invert_discarded()
+    assert container.discarded == [item]
+    assert item.discarded is True
+    assert [i.discarded for i in container] == [False, True]
+
+
+def test_matches_list_model():
+    rng = random.Random(0)
+    for _ in range(300):
+        container = ItemsContainer()
+        model: list[list] = []  # [item, expected discarded flag]
+        for _ in range(12):
+            op = rng.choice(["add", "remove", "invert", "remove_discarded", "read"])
+            if op == "add":
+                item = Item()
+                item.discarded = rng.random() < 0.5
+                container.add(item)
+                model.append([item, item.discarded])
+            elif op == "remove" and model:
+                container.remove(model.pop(rng.randrange(len(model)))[0])
+            elif op == "invert":
+                container.invert_discarded()
+                for i in model:
+                    i[1] = not i[1]
+            elif op == "remove_discarded":
+                container.remove_discarded()
+                model = [i for i in model if not i[1]]
+            elif op == "read":
+                assert list(container) == [i for i, _ in model]
+                assert [i.discarded for i, _ in model] == [d for _, d in model]
+                assert container.kept == [i for i, d in model if not d]
+                assert container.discarded == [i for i, d in model if d]
+            assert container.count_discarded() == sum(d for _, d in model)
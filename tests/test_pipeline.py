@@ -0,0 +1,424 @@
+import asyncio
+import itertools
+import threading
+
+import pytest
+from helpers import DoubleModifier, EvenFilter, FakeClock, NumberItem, make_numbers
+
+from pypipeline.action import Filter, Modifier
+from pypipeline.cache import ActionCache
+from pypipeline.constants import MULTI_PREFETCH
+from pypipeline.filter import IntFilter
+from pypipeline.item import ItemBatch
+from pypipeline.pipeline import AdaptivePipeline, AsyncPipeline, Pipeline
+
+
+def test_process_iter():
+    pipeline = Pipeline([EvenFilter(), DoubleModifier()])
+    res = list(pipeline.process_iter(make_numbers(10)))
+    assert len(res) == 10
+    assert [i.value for i in res if not i.discarded] == [0, 4, 8, 12, 16]
+
+    kept = pipeline.process_iter(make_numbers(10), mode="kept")
+    assert [i.value for i in kept] == [0, 4, 8, 12, 16]
+    discarded = pipeline.process_iter(make_numbers(10), mode="discarded")
+    assert [i.value for i in discarded] == [1, 3, 5, 7, 9]
+
+
+def test_process_iter_is_lazy():
+    pipeline = Pipeline([EvenFilter()])
+    items = (NumberItem(i) for i in itertools.count())
+    res = pipeline.process_iter(items, mode="kept")
+    assert [i.value for i in itertools.islice(res, 3)] == [0, 2, 4]
+
+
+def test_process_multi():
+    with Pipeline([EvenFilter(), DoubleModifier()]) as pipeline:
+        res = pipeline.process_multi(make_numbers(100), t=2, chunksize=7)
+    assert [i.value for i in res] == [i * 2 if i % 2 == 0 else i for i in range(100)]
+    assert len(res.kept) == 50
+    assert sum(i.items for i in pipeline.worker_stats) == 100
+    assert sum(i.chunks for i in pipeline.worker_stats) == 15
+    assert all(i.busy >= 0 and i.idle >= 0 for i in pipeline.worker_stats)
+
+
+def test_process_multi_iter_mode():
+    with Pipeline([EvenFilter()]) as pipeline:
+        res = pipeline.process_multi_iter(make_numbers(50), t=2, chunksize=4, mode="discarded")
+        assert [i.value for i in res] == list(range(1, 50, 2))
+
+
+def test_persistent_pool():
+    with Pipeline([EvenFilter()]) as pipeline:
+        pipeline.process_multi(make_numbers(20), t=2)
+        pool = pipeline._pool
+        assert pool is not None
+        assert len(pipeline.process_multi(make_numbers(20), t=2).kept) == 10
+        assert pipeline._pool is pool
+
+        pipeline.add_action(DoubleModifier())
+        assert pipeline._pool is None
+        res = pipeline.process_multi(make_numbers(4), t=2)
+        assert [i.value for i in res] == [0, 1, 4, 3]
+    assert pipeline._pool is None
+
+
+def test_process_verbose():
+    pipeline = Pipeline([EvenFilter()], verbose=True)
+    assert len(pipeline.process(make_numbers(10)).kept) == 5
+    with pipeline:
+        assert len(pipeline.process_multi(make_numbers(10), t=2, chunksize=3).kept) == 5
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processes"])
+def test_executors(executor):
+    items = make_numbers(30)
+    with Pipeline([EvenFilter(), DoubleModifier()], executor=executor) as pipeline:
+        res = pipeline.process_multi(items, t=3, chunksize=4)
+    assert [i.value for i in res] == [i * 2 if i % 2 == 0 else i for i in range(30)]
+    if executor == "threads":
+        assert all(a is b for a, b in zip(res, items))
+
+
+def test_invalid_executor():
+    with pytest.raises(ValueError):
+        Pipeline(executor="gpu")  # type: ignore
+
+
+class AsyncEvenFilter(Filter):
+    async def process(self, item: NumberItem) -> bool:
+        await asyncio.sleep(0.001 * (item.value % 3))
+        return item.value % 2 == 0
+
+
+def test_async_pipeline():
+    with pytest.raises(TypeError):
+        Pipeline([AsyncEvenFilter()])
+
+    pipeline = AsyncPipeline([AsyncEvenFilter(), DoubleModifier()])
+
+    async def run(mode):
+        return [i.value async for i in pipeline.process_async(make_numbers(20), concurrency=4, mode=mode)]
+
+    assert sorted(asyncio.run(run("kept"))) == list(range(0, 40, 4))
+    assert sorted(asyncio.run(run("discarded"))) == list(range(1, 20, 2))
+    assert len(pipeline.process(make_numbers(20)).kept) == 10
+
+    inverted = AsyncPipeline([AsyncEvenFilter(invert=True)])
+    assert [i.value for i in inverted.process(make_numbers(4)).kept] == [1, 3]
+
+
+class ValueFilter(IntFilter):
+    def get_value(self, item: NumberItem) -> int:
+        return item.value
+
+
+def test_process_batches():
+    pipeline = Pipeline([ValueFilter(10, 40), EvenFilter(invert=True), DoubleModifier()])
+    expected = [i.value for i in pipeline.process_iter(make_numbers(100), mode="kept")]
+    res = pipeline.process_batches(make_numbers(100), batch_size=16, mode="kept")
+    assert [i.value for i in res] == expected
+    res = pipeline.process_batches(make_numbers(100), batch_size=16, mode="discarded")
+    assert len(list(res)) + len(expected) == 100
+    assert [i.value for i in pipeline.process_iter(make_numbers(15), mode="kept")] == [22, 26]
+
+
+clock = FakeClock()
+
+
+class SlowFilter(Filter):
+    def process(self, item: NumberItem) -> bool:
+        clock.advance(0.001)
+        return item.value % 10 != 0
+
+
+class DivisibleByThreeFilter(Filter):
+    def process(self, item: NumberItem) -> bool:
+        return item.value % 3 == 0
+
+
+def test_adaptive_pipeline(monkeypatch):
+    monkeypatch.setattr("pypipeline.pipeline.time", clock)
+    slow, cheap, double = SlowFilter(), DivisibleByThreeFilter(), DoubleModifier()
+    pipeline = AdaptivePipeline([slow, cheap, double, EvenFilter()], reorder_interval=50)
+    expected = [i.value for i in Pipeline(pipeline.actions).process_iter(make_numbers(300), mode="kept")]
+    assert [i.value for i in pipeline.process_iter(make_numbers(300), mode="kept")] == expected
+    assert pipeline.actions[:3] == [cheap, slow, double]
+
+    pipeline = AdaptivePipeline([slow, cheap], reorder_interval=50)
+    res = pipeline.process_batches(make_numbers(300), batch_size=25, mode="kept")
+    assert [i.value for i in res] == [i for i in range(300) if i % 3 == 0 and i % 10 != 0]
+    assert pipeline.actions == [cheap, slow]
+
+
+def test_adaptive_pipeline_processes(monkeypatch, capsys):
+    monkeypatch.setattr("pypipeline.pipeline.time", clock)  # inherited by the forked workers
+    slow, cheap = SlowFilter(), DivisibleByThreeFilter()
+    with AdaptivePipeline([slow, cheap], executor="processes", reorder_interval=50) as pipeline:
+        res = pipeline.process_multi(make_numbers(300), t=2, chunksize=25)
+    assert [i.value for i in res.kept] == [i for i in range(300) if i % 3 == 0 and i % 10 != 0]
+    assert pipeline.actions == [cheap, slow]
+    pipeline.print_actions()
+    assert capsys.readouterr().out.count("pass_rate=") == 2
+
+
+class FailingFilter(Filter):
+    def process(self, item: NumberItem) -> bool:
+        if item.value == 3:
+            raise ValueError(item.value)
+        return True
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processes"])
+def test_profile(executor):
+    even, double = EvenFilter(), DoubleModifier()
+    with Pipeline([even, double], executor=executor, profile=True) as pipeline:
+        pipeline.process_multi(make_numbers(100), t=2, chunksize=10)
+    stats = pipeline.stats
+    assert stats is not None
+    even_stats, double_stats = stats.actions[repr(even)], stats.actions[repr(double)]
+    assert (even_stats.calls, even_stats.passed, even_stats.discarded) == (100, 50, 50)
+    assert (double_stats.calls, double_stats.passed) == (50, 50)
+    assert 0 < even_stats.percentile(50) <= even_stats.percentile(99)
+    assert "even-filter" in stats.table()
+    assert stats.dict()["actions"][0]["calls"] == 100
+
+
+@pytest.mark.parametrize("executor", ["threads", "processes"])
+def test_profile_across_runs(executor):
+    even = EvenFilter()
+    with Pipeline([even], executor=executor, profile=True) as pipeline:
+        pipeline.process(make_numbers(10))
+        pipeline.process_multi(make_numbers(10), t=2, chunksize=3)
+        assert pipeline.stats.actions[repr(even)].calls == 20  # type: ignore
+        pipeline.process_multi(make_numbers(100), t=2, chunksize=10)
+        pipeline.add_action(DoubleModifier())  # restarts the workers
+        pipeline.process_multi(make_numbers(100), t=2, chunksize=10)
+        assert pipeline.stats.actions[repr(even)].calls == 220  # type: ignore
+
+
+def test_profile_inverted_filter():
+    even, odd = EvenFilter(), EvenFilter(invert=True)
+    with Pipeline([even, odd], executor="threads", profile=True) as pipeline:
+        pipeline.process_multi(make_numbers(1000), t=4, chunksize=10)
+    stats = pipeline.stats
+    assert stats is not None
+    assert stats.actions[repr(even)].calls == 1000
+    assert stats.actions[f"{odd!r}!"].calls == 500
+
+
+def test_profile_errors():
+    failing = FailingFilter()
+    pipeline = Pipeline([failing], profile=True)
+    with pytest.raises(ValueError):
+        pipeline.process(make_numbers(10))
+    assert pipeline.stats.actions[repr(failing)].errors == 1  # type: ignore
+    assert pipeline.stats.actions[repr(failing)].calls == 3  # type: ignore
+
+
+class ColumnValueFilter(IntFilter):
+    column = "value"
+
+
+def test_process_columns():
+    values = list(range(20))
+    batch = ItemBatch({"value": list(values)})
+    pipeline = Pipeline([ColumnValueFilter(5, 15), EvenFilter(), DoubleModifier()])
+    pipeline.process_columns(batch)
+    assert [row.value for row in batch.rows()] == [12, 16, 20, 24, 28]
+    expected = pipeline.process_iter(make_numbers(20), mode="kept")
+    assert [row.value for row in batch.rows()] == [i.value for i in expected]
+
+
+def collect_numbers(lines: list[str]) -> list[NumberItem]:
+    return [NumberItem(int(i)) for i in lines]
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processes"])
+def test_process_file_iter(tmp_path, executor):
+    path = tmp_path / "items.txt"
+    path.write_text("\n".join(str(i) for i in range(500)) + "\n")
+    with Pipeline([EvenFilter(), DoubleModifier()], executor=executor) as pipeline:
+        res = pipeline.process_file_iter(str(path), collect_numbers, t=2, range_size=64, mode="kept")
+        assert [i.value for i in res] == [i * 2 for i in range(0, 500, 2)]
+
+
+class MarkModifier(Modifier):
+    def process(self, item: NumberItem) -> NumberItem:
+        item.extra["marked"] = True
+        return item
+
+    def eval(self, item: NumberItem) -> NumberItem:
+        item = super().eval(item)
+        item.discarded = item.value > 30
+        return item
+
+
+def test_compile():
+    actions = [EvenFilter(invert=True), DoubleModifier(), MarkModifier(), ValueFilter(0, 20)]
+    expected = [Pipeline(actions).process_item(i) for i in make_numbers(20)]
+    pipeline = Pipeline(actions)
+    process_item = pipeline.compile()
+    assert pipeline.process_item is process_item
+    res = [pipeline.process_item(i) for i in make_numbers(20)]
+    assert [i.dict() for i in res] == [i.dict() for i in expected]
+
+    pipeline.add_action(EvenFilter())
+    assert pipeline.process_item is not process_item
+    assert [i.value for i in pipeline.process_iter(make_numbers(20), mode="kept")] == [2, 6, 10, 14, 18]
+
+    with Pipeline([EvenFilter(), DoubleModifier()]) as pipeline:
+        pipeline.compile()
+        res = pipeline.process_multi(make_numbers(10), t=2)
+        assert [i.value for i in res.kept] == [0, 4, 8, 12, 16]
+
+
+def test_compile_batches():
+    pipeline = Pipeline([EvenFilter(), DoubleModifier()])
+    pipeline.compile()
+    res = pipeline.process_item_batch(make_numbers(6))
+    assert [i.value for i in res] == [0, 1, 4, 3, 8, 5]
+
+    pipeline = Pipeline([ValueFilter(2, 4), DoubleModifier()])
+    pipeline.compile()
+    assert "process_item_batch" not in pipeline.__dict__
+
+
+class KeyedItem(NumberItem):
+    __slots__ = ()
+
+    def cache_key(self):
+        return self.value
+
+
+class CountingFilter(EvenFilter):
+    calls = 0
+
+    def process(self, item: NumberItem) -> bool:
+        CountingFilter.calls += 1
+        return super().process(item)
+
+
+def test_action_cache():
+    cache = ActionCache(maxsize=16)
+    items = [KeyedItem(i % 5) for i in range(50)]
+    CountingFilter.calls = 0
+    pipeline = Pipeline([CountingFilter(), DoubleModifier(), CountingFilter(invert=True)], cache=cache)
+    res = list(pipeline.process_iter(items, mode="discarded"))
+    assert [i.value for i in res] == [0, 1, 4, 3, 8] * 10
+    assert CountingFilter.calls == 5 + 3
+    assert cache.misses == 11 and cache.hits == 50 + 30 + 30 - 11
+    assert len(cache) == 11
+
+    cache.clear()
+    pipeline.compile()
+    res = list(pipeline.process_iter([KeyedItem(i % 5) for i in range(50)], mode="discarded"))
+    assert [i.value for i in res] == [0, 1, 4, 3, 8] * 10
+    assert cache.misses == 11
+
+    cache = ActionCache(maxsize=2)
+    pipeline = Pipeline([CountingFilter()], cache=cache)
+    list(pipeline.process_iter([KeyedItem(i) for i in [1, 2, 1, 3, 2, 1]]))
+    assert (cache.hits, cache.misses, len(cache)) == (1, 5, 2)
+
+    CountingFilter.calls = 0
+    items = make_numbers(10) + make_numbers(10)
+    list(Pipeline([CountingFilter()], cache=ActionCache()).process_iter(items))
+    assert CountingFilter.calls == 20
+
+
+def test_action_cache_multi():
+    cache = ActionCache()
+    with Pipeline([EvenFilter(), DoubleModifier()], cache=cache) as pipeline:
+        res = pipeline.process_multi([KeyedItem(i % 4) for i in range(40)], t=2, chunksize=5)
+    assert [i.value for i in res] == [0, 1, 4, 3] * 10
+    assert cache.hits + cache.misses == 60
+    assert cache.misses <= 12
+
+
+@pytest.mark.parametrize("executor", ["threads", "processes"])
+def test_action_cache_counts_across_runs(executor):
+    cache = ActionCache()
+    with Pipeline([EvenFilter(), DoubleModifier()], executor=executor, cache=cache) as pipeline:
+        pipeline.process([KeyedItem(i % 4) for i in range(10)])
+        assert cache.hits + cache.misses == 15
+        pipeline.process_multi([KeyedItem(i % 4) for i in range(10)], t=2, chunksize=3)
+        assert cache.hits + cache.misses == 30
+        pipeline.process_multi([KeyedItem(i % 4) for i in range(1000)], t=2, chunksize=10)
+        assert cache.hits + cache.misses == 1530
+
+
+def test_process_limit():
+    pipeline = Pipeline([EvenFilter()])
+    assert len(pipeline.process(make_numbers(100), limit=3).kept) == 3
+    assert len(pipeline.process(make_numbers(100), limit=3)) == 5
+
+    consumed = itertools.count()
+    items = (NumberItem(next(consumed)) for _ in range(1000))
+    res = pipeline.process_iter(items, mode="discarded", limit=4)
+    assert [i.value for i in res] == [1, 3, 5, 7]
+    assert next(consumed) == 8
+
+
+@pytest.mark.parametrize("executor", ["threads", "processes"])
+def test_process_multi_limit(executor):
+    consumed = itertools.count()
+    items = (NumberItem(next(consumed)) for _ in range(100_000))
+    with Pipeline([EvenFilter()], executor=executor) as pipeline:
+        res = list(pipeline.process_multi_iter(items, t=2, chunksize=10, mode="kept", limit=5))
+        assert [i.value for i in res] == [0, 2, 4, 6, 8]
+        assert next(consumed) <= 10 * 2 * MULTI_PREFETCH + 1
+        assert len(pipeline.process_multi(make_numbers(100), t=2, chunksize=10, limit=12).kept) == 12
+        assert len(pipeline.process_multi(make_numbers(100), t=2, chunksize=10).kept) == 50
+
+
+release_first = threading.Event()
+
+
+class BlockFirstFilter(Filter):
+    def process(self, item: NumberItem) -> bool:
+        if item.value == 0:
+            assert release_first.wait(10)
+        return True
+
+
+def test_process_multi_unordered():
+    release_first.clear()
+    with Pipeline([BlockFirstFilter()], executor="threads") as pipeline:
+        res = pipeline.process_multi_iter(make_numbers(20), t=2, chunksize=2, mode="kept", ordered=False)
+        first = next(res)
+        assert first.value != 0
+        release_first.set()
+        assert sorted([first.value] + [i.value for i in res]) == list(range(20))
+        res = [i.value for i in pipeline.process_multi(make_numbers(20), t=2, chunksize=2)]
+        assert res == list(range(20))
+
+
+def test_async_pipeline_sync_paths():
+    even = AsyncEvenFilter()
+    with AsyncPipeline([even, DoubleModifier()], profile=True) as pipeline:
+        assert [i.value for i in pipeline.process_iter(make_numbers(10), mode="kept")] == list(range(0, 20, 4))
+        loop = pipeline._loop
+        assert pipeline.process_item(NumberItem(2)).value == 4
+        assert pipeline._loop is loop
+
+        async def inside_loop():
+            return pipeline.process_item(NumberItem(4)).value
+
+        assert asyncio.run(inside_loop()) == 8
+    assert pipeline._loop is None
+    assert pipeline.stats.actions[repr(even)].calls == 12  # type: ignore
+
+    with pytest.raises(ValueError):
+        AsyncPipeline([even], cache=ActionCache())
+
+
+def test_process_async_ordered():
+    pipeline = AsyncPipeline([AsyncEvenFilter()])
+
+    async def run(ordered):
+        items = pipeline.process_async(make_numbers(30), concurrency=4, ordered=ordered)
+        return [i.value async for i in items]
+
+    assert asyncio.run(run(True)) == list(range(30))
+    assert sorted(asyncio.run(run(False))) == list(range(30))
@@ -0,0 +1,88 @@
+from pypipeline.action import Filter, Modifier
+from pypipeline.cli import CommandLineActionsManager
+from pypipeline.filter import IntFilter
+from pypipeline.schema import get_schema, load_schemas, save_schemas
+
+
+class PathFilter(Filter):
+    """
+    Keep paths.
+
+    Longer description.
+    """
+
+    abbrev = "pf"
+
+    def process(self, item) -> bool:
+        return True
+
+
+class NameModifier(Modifier):
+    """Change names."""
+
+    def process(self, item):
+        return item
+
+
+def test_get_schema():
+    schema = get_schema(PathFilter)
+    assert schema.name == "path-filter"
+    assert schema.type == "filter"
+    assert schema.abbrev == "pf"
+    assert schema.description == "Keep paths."
+    assert get_schema(PathFilter) is schema
+    assert PathFilter.get_schema() is schema
+
+
+def test_schema_params():
+    class SizeFilter(Filter):
+        def __init__(self, low: int, high=10, *args, invert=False, **kwargs) -> None:
+            self.low = low
+            self.high = high
+            super().__init__(invert=invert)
+
+    params = SizeFilter.get_schema().params
+    assert [i.name for i in params] == ["low", "high", "invert"]
+    assert [i.type for i in params] == [int, int, bool]
+    assert [i.is_optional for i in params] == [False, True, True]
+    assert SizeFilter.get_schema().params is params
+    assert SizeFilter(1).get_args() == {"low": 1, "high": 10}
+
+    schema = IntFilter.get_schema()
+    assert schema.parsable
+    assert [i.name for i in schema.parse_params] == ["val"]
+    assert schema.get_param("low") is not None
+    assert schema.get_param("low", parse=True) is None
+
+
+def test_schema_cache(tmp_path):
+    path = str(tmp_path / "schemas.json")
+    actions = [PathFilter, NameModifier]
+    assert load_schemas(actions, path) is None
+    manager = CommandLineActionsManager(actions, schema_cache=path)  # type: ignore
+    abbrevs = [i.abbrev for i in actions]
+
+    schemas = load_schemas(actions, path)
+    assert schemas is not None
+    assert [i.abbrev for i in schemas] == abbrevs
+    assert [i.description for i in schemas] == ["Keep paths.", "Change names."]
+    assert load_schemas([NameModifier], path) is None
+
+    cached = CommandLineActionsManager(actions, schema_cache=path)  # type: ignore
+    assert list(cached.cli_action_map) == list(manager.cli_action_map)
+
+
+def test_schema_cache_package_changed(tmp_path, monkeypatch):
+    path = str(tmp_path / "schemas.json")
+    save_schemas([PathFilter], path)
+    assert load_schemas([PathFilter], path) is not None
+    monkeypatch.setattr("pypipeline.schema._package_mtime", lambda: 0)
+    assert load_schemas([PathFilter], path) is None
+
+
+def test_schema_cache_invalid_file(tmp_path):
+    path = tmp_path / "schemas.json"
+    path.write_text("not json")
+    assert load_schemas([PathFilter], str(path)) is None
+    save_schemas([PathFilter], str(path))
+    assert load_schemas([PathFilter], str(path)) is not None
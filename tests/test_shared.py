@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from pypipeline.action import Modifier
+from pypipeline.filter import IntFilter
+from pypipeline.item import ItemBatch
+from pypipeline.pipeline import Pipeline
+
+
+class ValueFilter(IntFilter):
+    column = "value"
+
+
+class ScaleModifier(Modifier):
+    def process(self, item):
+        item.value *= 2
+        return item
+
+    def process_batch(self, batch):
+        batch.columns["value"] = batch["value"] * 2
+        return batch
+
+
+class LabelModifier(Modifier):
+    def process(self, item):
+        item.label = f"{item.label}!"
+        return item
+
+
+def make_batch(n: int) -> ItemBatch:
+    return ItemBatch({"value": np.arange(n), "label": [str(i) for i in range(n)]})
+
+
+def expected_values(n: int) -> list[int]:
+    return [i * 2 for i in range(n) if 10 <= i <= 60]
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processes"])
+def test_process_columns_multi(executor):
+    with Pipeline([ValueFilter(10, 60), ScaleModifier(), LabelModifier()], executor=executor) as pipeline:
+        batch = pipeline.process_columns_multi(make_batch(100), t=2, chunksize=16)
+    assert [row.value for row in batch.rows()] == expected_values(100)
+    assert [row.label for row in batch.rows()] == [f"{i}!" for i in range(10, 61)]
+    assert batch.count_kept() == 51
+
+
+def test_shared_batch():
+    with Pipeline([ValueFilter(10, 60), ScaleModifier()]) as pipeline:
+        shared = pipeline.share(make_batch(100))
+        assert pipeline.share(shared) is shared
+        assert pipeline.process_columns_multi(shared, t=2, chunksize=16) is shared
+        assert [row.value for row in shared.rows()] == expected_values(100)
+        assert shared.count_discarded() == 49
+        pipeline.release(shared)
+        assert shared not in pipeline._shared
+
+        shared = pipeline.share(make_batch(10))
+    assert len(pipeline._shared) == 0
+
+
+class HalfModifier(Modifier):
+    def process(self, item):
+        item.value /= 2
+        return item
+
+    def process_batch(self, batch):
+        batch.columns["value"] = batch["value"] / 2
+        return batch
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processes"])
+def test_process_columns_multi_dtype_change(executor):
+    with Pipeline([HalfModifier()], executor=executor) as pipeline:
+        batch = pipeline.process_columns_multi(ItemBatch({"value": np.arange(6)}), t=2, chunksize=2)
+    assert batch["value"].dtype == np.float64
+    assert batch["value"].tolist() == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5]
+
+
+@pytest.mark.parametrize("executor", ["threads", "processes"])
+def test_process_columns_multi_dtype_change_kept_rows(executor):
+    with Pipeline([ValueFilter(2, 3), HalfModifier()], executor=executor) as pipeline:
+        batch = pipeline.process_columns_multi(ItemBatch({"value": np.arange(6)}), t=2, chunksize=2)
+    assert batch["value"].dtype == np.float64
+    assert [row.value for row in batch.rows()] == [1.0, 1.5]
+
+
+def test_modifier_skips_discarded_rows():
+    batch = ItemBatch({"value": np.arange(6)})
+    Pipeline([ValueFilter(2, 3), ScaleModifier()], executor="serial").process_columns(batch)
+    assert batch["value"].tolist() == [0, 1, 4, 6, 4, 5]
+
+    batch = ItemBatch({"value": np.arange(6)})
+    Pipeline([ValueFilter(2, 3), HalfModifier()], executor="serial").process_columns(batch)
+    assert batch["value"].tolist() == [0.0, 1.0, 1.0, 1.5, 4.0, 5.0]
@@ -0,0 +1,48 @@
+import io
+import json
+import threading
+
+from helpers import PathItem, make_paths
+
+from pypipeline.sink import BinarySink, JsonlSink, TextSink, open_sink, read_binary
+
+
+def test_text_sink_buffers_writes():
+    file = io.StringIO()
+    sink = TextSink(file, buffer_size=32)
+    sink.write_many(make_paths(2))
+    assert file.getvalue() == ""
+    sink.write_many(make_paths(3))
+    assert file.getvalue() != ""
+    sink.close()
+    assert file.getvalue().splitlines() == [str(i) for i in make_paths(2) + make_paths(3)]
+
+
+def test_jsonl_sink():
+    file = io.StringIO()
+    with JsonlSink(file) as sink:
+        sink.write_many(make_paths(3))
+    rows = [json.loads(line) for line in file.getvalue().splitlines()]
+    assert rows == [{"discarded": False, "path": i.path} for i in make_paths(3)]
+
+
+def test_binary_sink_roundtrip(tmp_path):
+    path = tmp_path / "out.bin"
+    with open_sink("binary", str(path)) as sink:
+        assert isinstance(sink, BinarySink)
+        sink.write_many(make_paths(100))
+    with open(path, "rb") as f:
+        rows = list(read_binary(f))
+    assert rows == [i.dict() for i in make_paths(100)]
+
+
+def test_binary_sink_unpicklable_values():
+    item = PathItem("a.py")
+    item.extra["lock"] = threading.Lock()
+    file = io.BytesIO()
+    with BinarySink(file) as sink:
+        sink.write(item)
+    file.seek(0)
+    (row,) = read_binary(file)
+    assert row["path"] == "a.py"
+    assert isinstance(row["extra"], str)
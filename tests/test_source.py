@@ -0,0 +1,34 @@
+from pypipeline.source import line_ranges, read_range
+from pypipeline.util import read_lines
+
+
+def test_line_ranges(tmp_path):
+    path = tmp_path / "items.txt"
+    lines = [f"item-{i}" for i in range(1000)]
+    path.write_text("\n".join(lines))
+    ranges = line_ranges(str(path), size=100)
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == path.stat().st_size
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    read = [line for start, end in ranges for line in read_range(str(path), start, end)]
+    assert read == lines
+
+
+def test_line_ranges_edge_cases(tmp_path):
+    empty = tmp_path / "empty.txt"
+    empty.write_text("")
+    assert line_ranges(str(empty)) == []
+
+    path = tmp_path / "items.txt"
+    path.write_text("a\n\nbb\n")
+    assert line_ranges(str(path), size=1) == [(0, 2), (2, 3), (3, 6)]
+    assert read_range(str(path), 0, 6) == ["a", "bb"]
+
+
+def test_read_range_matches_read_lines(tmp_path):
+    path = tmp_path / "items.txt"
+    path.write_bytes("a\x0cb\nc\r\nd\re\x85\u2028\n\nf".encode())
+    with open(path, encoding="utf-8", errors="surrogateescape", newline="\n") as f:
+        streamed = [line for lines in read_lines(f, 2) for line in lines]
+    assert read_range(str(path), 0, path.stat().st_size) == streamed
+    assert streamed == ["a\x0cb", "c", "d\re\x85\u2028", "f"]
@@ -0,0 +1,93 @@
+import itertools
+import threading
+
+import pytest
+from helpers import EvenFilter, KeyedItem, NumberItem, make_numbers
+
+from pypipeline.action import Modifier
+from pypipeline.cache import ActionCache
+from pypipeline.staged import Stage, StagedPipeline
+
+
+class AddModifier(Modifier):
+    def process(self, item: NumberItem) -> NumberItem:
+        item.value += 100
+        return item
+
+
+release_first = threading.Event()
+
+
+class BlockFirstModifier(Modifier):
+    def process(self, item: NumberItem) -> NumberItem:
+        if item.value == 0:
+            release_first.wait(0.5)  # only released early if too much input is read
+        return item
+
+
+class FailingModifier(Modifier):
+    def process(self, item: NumberItem) -> NumberItem:
+        if item.value == 50:
+            raise ValueError("bad item")
+        return item
+
+
+@pytest.mark.parametrize("executor", ["threads", "processes"])
+def test_process_staged(executor):
+    stages = [Stage([EvenFilter()]), Stage([AddModifier()], workers=2, executor=executor, queue_size=2)]
+    with StagedPipeline(stages) as pipeline:
+        res = list(pipeline.process_staged(make_numbers(100), chunksize=8))
+        assert [i.value for i in res] == [i + 100 if i % 2 == 0 else i for i in range(100)]
+        kept = pipeline.process_multi(make_numbers(30), t=1, chunksize=4).kept
+        assert [i.value for i in kept] == list(range(100, 130, 2))
+    filter_stats, modifier_stats = pipeline.stage_stats
+    assert filter_stats.items == 30 and modifier_stats.items == 15
+    assert modifier_stats.max_queue_depth <= 2
+    assert modifier_stats.throughput > 0
+
+
+def test_process_staged_backpressure():
+    stages = [Stage([EvenFilter()]), Stage([AddModifier()], queue_size=1)]
+    pipeline = StagedPipeline(stages)
+    consumed = itertools.count()
+    items = (NumberItem(next(consumed)) for _ in range(10_000))
+    res = pipeline.process_staged(items, chunksize=4, mode="kept")
+    assert [i.value for i in itertools.islice(res, 3)] == [100, 102, 104]
+    res.close()
+    assert next(consumed) < 200
+
+
+def test_process_staged_error():
+    pipeline = StagedPipeline([Stage([EvenFilter()]), Stage([FailingModifier()], workers=2)])
+    with pytest.raises(ValueError, match="bad item"):
+        list(pipeline.process_staged(make_numbers(100), chunksize=8))
+
+
+def test_process_staged_bounds_reorder_buffer():
+    release_first.clear()
+    stages = [Stage([EvenFilter()], queue_size=2), Stage([BlockFirstModifier()], workers=2, queue_size=2)]
+    max_items = (sum(i.queue_size + i.workers for i in stages) + 1) * 4
+    pulled = []
+
+    def items():
+        for i in range(10_000):
+            if i >= max_items:
+                release_first.set()
+            pulled.append(i)
+            yield NumberItem(i)
+
+    res = StagedPipeline(stages).process_staged(items(), chunksize=4)
+    assert next(res).value == 0
+    assert len(pulled) <= max_items
+    assert [i.value for i in res] == list(range(1, 10_000))
+
+
+@pytest.mark.parametrize("executor", ["threads", "processes"])
+def test_process_staged_profile(executor):
+    even, add = EvenFilter(), AddModifier()
+    stages = [Stage([even]), Stage([add], workers=2, executor=executor)]
+    with StagedPipeline(stages, profile=True, cache=ActionCache()) as pipeline:
+        list(pipeline.process_staged([KeyedItem(i % 10) for i in range(100)], chunksize=8))
+    assert pipeline.stats.actions[repr(even)].calls == 100  # type: ignore
+    assert pipeline.stats.actions[repr(add)].calls == 50  # type: ignore
+    assert pipeline.cache.hits + pipeline.cache.misses == 150  # type: ignore
@@ -0,0 +1,53 @@
+import io
+import re
+from fnmatch import fnmatch
+
+import pytest
+
+from pypipeline.util import chunked, glob_matcher, read_lines, regex_matcher
+
+TEXTS = ["", "a", "main.py", "src/main.py", "test_main.py", "a.py.txt", "ab]c", "x[a]y", "a\nb.py"]
+
+
+def test_chunked():
+    assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(chunked([], 3)) == []
+    with pytest.raises(ValueError):
+        list(chunked([1], 0))
+
+
+def test_read_lines():
+    file = io.StringIO("a\nb\r\n\nc\nd")
+    assert list(read_lines(file, 2)) == [["a", "b"], ["c"], ["d"]]
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    ["*", "main.py", "*.py", "test_*", "*main*", "src/*.py", "*a*.*", "?ain.py", "x[ab]y", "*[!a]", "a[b", "*]c"],
+)
+def test_glob_matcher(pattern):
+    match = glob_matcher(pattern)
+    for text in TEXTS:
+        assert bool(match(text)) == fnmatch(text, pattern), text
+
+
+@pytest.mark.parametrize(
+    "pattern,flags",
+    [
+        ("main", 0),
+        (r"\.py", 0),
+        (r"^test_", 0),
+        (r"\Asrc", 0),
+        (r"^b", re.MULTILINE),
+        (r"main\.py$", 0),
+        (r"ma.n", 0),
+        (r"MAIN", re.IGNORECASE),
+        (r"(a|b)\.py", 0),
+        ("", 0),
+    ],
+)
+def test_regex_matcher(pattern, flags):
+    compiled = re.compile(pattern, flags)
+    match = regex_matcher(compiled)
+    for text in TEXTS:
+        assert bool(match(text)) == (compiled.search(text) is not None), text